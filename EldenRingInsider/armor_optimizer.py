@@ -0,0 +1,165 @@
+# EldenRingInsider/armor_optimizer.py
+import json
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from .catalog import get_catalog_version
+from .models import Item
+
+ARMOR_DATA = os.path.join(settings.BASE_DIR, "data", "1.10.0", "armor.json")
+ARMOR_SLOTS = ('head', 'body', 'arms', 'legs')
+
+# Objective features, in column order: armor.json absorptions, then resistances (incl. poise)
+ABSORPTIONS = ('physical', 'strike', 'slash', 'pierce', 'magic', 'fire', 'lightning', 'holy')
+RESISTANCES = ('immunity', 'robustness', 'focus', 'vitality', 'poise')
+FEATURES = ABSORPTIONS + RESISTANCES
+
+# every absorption plus poise, equally weighted
+DEFAULT_OBJECTIVE = {**{a: 1.0 for a in ABSORPTIONS}, 'poise': 1.0}
+
+MAX_CACHED_OBJECTIVES = 128
+
+
+def canonical_objective(objective):
+    """Objective dict as a FEATURES-aligned tuple of floats (the frontier cache key). Raises ValueError."""
+    if objective is not None and not isinstance(objective, dict):
+        raise ValueError("objective must be an object")
+    objective = DEFAULT_OBJECTIVE if not objective else objective
+    unknown = set(objective) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"unknown objective features: {sorted(unknown)}")
+    return tuple(float(objective.get(f, 0.0)) for f in FEATURES)
+
+
+def frontier(weights, scores):
+    """Indices of the (weight, score) Pareto frontier: lighter or better than everything kept, by weight."""
+    order = np.lexsort((-scores, weights))
+    best = np.maximum.accumulate(scores[order])
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = scores[order][1:] > best[:-1]
+    return order[keep]
+
+
+class ArmorTable:
+    """
+    Per-slot armor arrays for the current catalog: ids, weights and a (n, FEATURES) matrix read from
+    armor.json (the Item table doesn't store absorptions). Frontiers are memoised per objective.
+    """
+
+    def __init__(self, version, records, armor_data):
+        self.version = version
+        by_id = {str(a["id"]): a for a in armor_data.values()}
+        by_name = {a["name"]: a for a in armor_data.values()}
+        self.slots = {}
+        for slot in ARMOR_SLOTS:
+            rows = [r for r in records if r[2] == slot]
+            features = np.zeros((len(rows), len(FEATURES)))
+            for i, (_, name, _, erdb_id, _) in enumerate(rows):
+                data = by_id.get(erdb_id) or by_name.get(name) or {}
+                values = {**(data.get("absorptions") or {}), **(data.get("resistances") or {})}
+                features[i] = [values.get(f) or 0 for f in FEATURES]
+            self.slots[slot] = {
+                'ids': np.asarray([r[0] for r in rows], dtype=np.int64),
+                'names': [r[1] for r in rows],
+                'weights': np.asarray([r[4] or 0 for r in rows], dtype=np.float64),
+                'features': features,
+            }
+        self._frontiers = {}
+        self._lock = threading.Lock()
+
+    def frontiers(self, objective):
+        """
+        Per slot: (item rows, weights, scores) of the Pareto frontier under `objective` (a canonical
+        tuple), lightest first. Row -1 is the empty slot (weight 0, score 0).
+        """
+        found = self._frontiers.get(objective)
+        if found is None:
+            w = np.asarray(objective)
+            found = {}
+            for slot, data in self.slots.items():
+                rows = np.append(np.arange(len(data['ids'])), -1)
+                weights = np.append(data['weights'], 0.0)
+                scores = np.append(data['features'] @ w, 0.0)
+                keep = frontier(weights, scores)
+                found[slot] = (rows[keep], weights[keep], scores[keep])
+            with self._lock:
+                if len(self._frontiers) >= MAX_CACHED_OBJECTIVES:
+                    self._frontiers.clear()
+                self._frontiers[objective] = found
+        return found
+
+
+def _load_records():
+    return list(
+        Item.objects.filter(type__in=ARMOR_SLOTS).order_by('id').values_list('id', 'name', 'type', 'erdb_id', 'weight')
+    )
+
+
+_armor = None
+_armor_lock = threading.Lock()
+
+
+def get_armor_table():
+    """ArmorTable for the current catalog version (rebuilt when the catalog stamp moves)."""
+    global _armor
+    version = get_catalog_version()
+    table = _armor
+    if table is not None and table.version == version:
+        return table
+    with _armor_lock:
+        table = _armor
+        if table is None or table.version != version:
+            with open(ARMOR_DATA, encoding="utf-8") as f:
+                table = ArmorTable(version, _load_records(), json.load(f))
+            _armor = table
+    return table
+
+
+def _pair(a, b):
+    """Frontier of every combination of two slot frontiers: (rows_a, rows_b, weights, scores)."""
+    weights = (a[1][:, None] + b[1][None, :]).ravel()
+    scores = (a[2][:, None] + b[2][None, :]).ravel()
+    keep = frontier(weights, scores)
+    ia, ib = np.unravel_index(keep, (len(a[0]), len(b[0])))
+    return a[0][ia], b[0][ib], weights[keep], scores[keep]
+
+
+def optimize_armor(objective=None, max_weight=None):
+    """
+    Best head/body/arms/legs combination for a linear `objective` ({feature: weight}, see FEATURES)
+    with total armor weight <= `max_weight` (no cap when None). An empty slot is a valid choice, so any
+    cap >= 0 has a loadout; a malformed objective or a negative cap raises ValueError.
+
+    Each slot is first cut to its (weight, score) Pareto frontier, head+body and arms+legs frontiers
+    are paired and pruned again, and the two halves are joined with one binary search per pair.
+    Returns {slot: item id or None, ..., 'weight', 'score'}.
+    """
+    key = canonical_objective(objective)
+    if max_weight is not None and not float(max_weight) >= 0:
+        raise ValueError("max_weight must be >= 0")
+    table = get_armor_table()
+    fronts = table.frontiers(key)
+    upper = _pair(fronts['head'], fronts['body'])
+    lower = _pair(fronts['arms'], fronts['legs'])
+
+    cap = np.inf if max_weight is None else float(max_weight) + 1e-9
+    # lower frontier is sorted by weight with rising score: the heaviest that fits is the best
+    fit = np.searchsorted(lower[2], cap - upper[2], side='right') - 1
+    ok = fit >= 0
+    if not ok.any():
+        raise ValueError("no armor combination fits max_weight")
+    totals = np.where(ok, upper[3] + lower[3][np.maximum(fit, 0)], -np.inf)
+    u = int(np.argmax(totals))
+    l = int(fit[u])
+
+    picked = dict(zip(ARMOR_SLOTS, (upper[0][u], upper[1][u], lower[0][l], lower[1][l])))
+    result = {
+        slot: None if row < 0 else int(table.slots[slot]['ids'][row])
+        for slot, row in picked.items()
+    }
+    result['weight'] = round(float(upper[2][u] + lower[2][l]), 2)
+    result['score'] = round(float(totals[u]), 2)
+    return result
@@ -0,0 +1,384 @@
+# EldenRingInsider/attack_rating.py
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+
+from .catalog import get_catalog_version, parse_required_stats
+from .eligibility import REQUIREMENT_STATS
+from .models import Item
+
+GAME_DATA_DIR = os.path.join(settings.BASE_DIR, "data", "1.10.0")
+GAME_DATA_FILES = ("correction-graph.json", "reinforcements.json", "correction-attack.json")
+
+# Array axes: damage types (T) and scaling stats (K, same order as the requirement matrix)
+DAMAGE_TYPES = ('physical', 'magic', 'fire', 'lightning', 'holy')
+SCALING_STATS = REQUIREMENT_STATS
+
+MAX_LEVEL = 25                 # upgrade levels are given on the regular +0..+25 scale
+REQUIREMENT_PENALTY = 0.4      # unmet requirement: -40% of base, no scaling bonus
+TWO_HAND_STRENGTH = 1.5
+
+
+# ------------------------------
+# Game tables (correction graphs, reinforcement paths, correction-attack), loaded once
+# ------------------------------
+def _read(filename):
+    with open(os.path.join(GAME_DATA_DIR, filename), encoding="utf-8") as f:
+        return json.load(f)
+
+
+class GameTables:
+    """
+    The 1.10.0 damage tables as dense arrays:
+      graphs             (G, stat 0..150)   correction curve value (fraction of full scaling)
+      reinf_damage       (R, level, T)      base damage multiplier per upgrade level
+      reinf_scaling      (R, level, K)      scaling multiplier per upgrade level
+      reinf_levels       (R,)               highest level of the path (25, 10 for somber, ...)
+      corr_flags         (C, T, K)          does stat K scale damage type T
+      corr_override      (C, T, K)          scaling value replacing the weapon's own (nan = none)
+      corr_ratio         (C, T, K)          multiplier on the scaling value
+    Shorter reinforcement paths are padded with their last level.
+    """
+
+    def __init__(self, graphs, reinforcements, corrections):
+        graph_ids = sorted(graphs, key=int)
+        self.graph_row = {int(g): i for i, g in enumerate(graph_ids)}
+        self.graphs = np.asarray([graphs[g] for g in graph_ids], dtype=np.float64)
+        self.max_stat = self.graphs.shape[1] - 1
+
+        reinf_ids = sorted(reinforcements, key=int)
+        self.reinf_row = {int(r): i for i, r in enumerate(reinf_ids)}
+        depth = max(len(levels) for levels in reinforcements.values())
+        self.reinf_damage = np.ones((len(reinf_ids), depth, len(DAMAGE_TYPES)))
+        self.reinf_scaling = np.ones((len(reinf_ids), depth, len(SCALING_STATS)))
+        self.reinf_levels = np.zeros(len(reinf_ids), dtype=np.intp)
+        for i, r in enumerate(reinf_ids):
+            levels = sorted(reinforcements[r], key=lambda lv: lv["level"])
+            for j in range(depth):
+                lv = levels[min(j, len(levels) - 1)]
+                self.reinf_damage[i, j] = [lv["damage"].get(t, 1.0) for t in DAMAGE_TYPES]
+                self.reinf_scaling[i, j] = [lv["scaling"].get(k, 1.0) for k in SCALING_STATS]
+            self.reinf_levels[i] = len(levels) - 1
+
+        corr_ids = sorted(corrections, key=int)
+        self.corr_row = {int(c): i for i, c in enumerate(corr_ids)}
+        shape = (len(corr_ids), len(DAMAGE_TYPES), len(SCALING_STATS))
+        self.corr_flags = np.zeros(shape, dtype=bool)
+        self.corr_override = np.full(shape, np.nan)
+        self.corr_ratio = np.ones(shape)
+        for i, c in enumerate(corr_ids):
+            entry = corrections[c]
+            for t, dtype in enumerate(DAMAGE_TYPES):
+                for k, stat in enumerate(SCALING_STATS):
+                    self.corr_flags[i, t, k] = bool(entry["correction"].get(dtype, {}).get(stat))
+                    self.corr_ratio[i, t, k] = entry["ratio"].get(dtype, {}).get(stat, 1.0)
+                    if stat in entry["override"].get(dtype, {}):
+                        self.corr_override[i, t, k] = entry["override"][dtype][stat]
+
+    def level_index(self, reinf_rows, levels):
+        """(W, L) row into a path for levels on the +0..+25 scale (+25 is +10 on a somber path)."""
+        top = self.reinf_levels[reinf_rows][:, None]
+        return np.rint(np.asarray(levels)[None, :] * top / MAX_LEVEL).astype(np.intp)
+
+
+@lru_cache(maxsize=1)
+def get_tables():
+    tables = GameTables(*(_read(f) for f in GAME_DATA_FILES))
+    h = hashlib.sha256()
+    for filename in GAME_DATA_FILES:
+        with open(os.path.join(GAME_DATA_DIR, filename), "rb") as f:
+            h.update(f.read())
+    tables.digest = h.hexdigest()
+    return tables
+
+
+# ------------------------------
+# Weapon table (one row per catalog item that has attack data)
+# ------------------------------
+class WeaponTable:
+    """
+    Per-weapon arrays for the AR broadcast:
+      base (W, T), requirements (W, K), graph (W, T) rows into tables.graphs,
+      reinf (W,) rows into the reinforcement arrays,
+      scaling (W, T, K) effective scaling value per damage type and stat (0 where the stat doesn't apply)
+    `unscored` holds the ids of weapons left out because their upgrade path is unknown (no reinforcement_id:
+    re-import armaments.json); guessing a path would give somber weapons the regular-stone numbers.
+    """
+
+    def __init__(self, version, records, tables, unscored=()):
+        self.version = version
+        self.tables = tables
+        self.unscored = frozenset(unscored)
+        self.ids = np.asarray([r[0] for r in records], dtype=np.int64)
+        self.names = [r[1] for r in records]
+        self.types = [r[2] for r in records]
+        self.row_of = {item_id: i for i, item_id in enumerate(self.ids.tolist())}
+        # identifies the AR inputs (game data + weapon rows), e.g. to find matching precomputed tables
+        self.digest = hashlib.sha256(
+            (tables.digest + json.dumps(records, sort_keys=True, default=str)).encode("utf-8")
+        ).hexdigest()
+
+        n, T, K = len(records), len(DAMAGE_TYPES), len(SCALING_STATS)
+        self.base = np.zeros((n, T))
+        self.requirements = np.zeros((n, K), dtype=np.int32)
+        self.graph = np.zeros((n, T), dtype=np.intp)
+        self.reinf = np.zeros(n, dtype=np.intp)
+        own_scaling = np.zeros((n, K))
+        corr = np.zeros(n, dtype=np.intp)
+
+        for i, (_, _, _, attack, required) in enumerate(records):
+            base = attack.get("base_damage") or {}
+            calc = attack.get("correction_calc_id") or {}
+            scaling = attack.get("scaling") or {}
+            self.base[i] = [base.get(t) or 0 for t in DAMAGE_TYPES]
+            self.graph[i] = [tables.graph_row.get(calc.get(t), 0) for t in DAMAGE_TYPES]
+            own_scaling[i] = [scaling.get(k) or 0 for k in SCALING_STATS]
+            corr[i] = tables.corr_row[attack["correction_attack_id"]]
+            self.reinf[i] = tables.reinf_row[attack["reinforcement_id"]]
+            required = parse_required_stats(required)
+            self.requirements[i] = [required.get(k, 0) for k in SCALING_STATS]
+
+        flags = tables.corr_flags[corr]
+        override = tables.corr_override[corr]
+        applies = flags | ~np.isnan(override)
+        value = np.where(np.isnan(override), own_scaling[:, None, :], override)
+        self.scaling = np.where(applies, value * tables.corr_ratio[corr], 0.0)
+        self.applies = applies & (self.scaling > 0)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def _load_weapons():
+    """(records, unscored ids): weapons with known correction and reinforcement ids, and those missing the latter."""
+    records, unscored = [], []
+    rows = Item.objects.filter(attack_power__isnull=False).order_by('id').values_list(
+        'id', 'name', 'type', 'attack_power', 'required_stats',
+    )
+    tables = get_tables()
+    for item_id, name, item_type, attack, required in rows:
+        if not isinstance(attack, dict) or attack.get("correction_attack_id") not in tables.corr_row:
+            continue
+        if attack.get("reinforcement_id") in tables.reinf_row:
+            records.append((item_id, name, item_type, attack, required))
+        else:
+            unscored.append(item_id)
+    return records, unscored
+
+
+_weapons = None
+_weapons_lock = threading.Lock()
+
+
+def get_weapon_table():
+    """WeaponTable for the current catalog version (rebuilt when the catalog stamp moves)."""
+    global _weapons
+    version = get_catalog_version()
+    table = _weapons
+    if table is not None and table.version == version:
+        return table
+    with _weapons_lock:
+        table = _weapons
+        if table is None or table.version != version:
+            records, unscored = _load_weapons()
+            table = WeaponTable(version, records, get_tables(), unscored)
+            _weapons = table
+    return table
+
+
+# ------------------------------
+# AR
+# ------------------------------
+def stat_matrix(stats_list, two_handed=False):
+    """(P, K) int stat vectors; two-handing counts strength x1.5."""
+    stats = np.asarray([[int(s.get(k, 0)) for k in SCALING_STATS] for s in stats_list], dtype=np.intp)
+    if two_handed:
+        stats[:, 0] = np.floor(stats[:, 0] * TWO_HAND_STRENGTH)
+    return stats
+
+
+def attack_rating(weapons, levels, stats, rows=None):
+    """
+    AR per damage type, shape (W, L, P, T), for every weapon x upgrade level x stat vector.
+
+    `levels` are on the +0..+25 scale, `stats` a (P, K) matrix from stat_matrix and `rows`
+    optionally restricts the weapons. Per type:
+        base * damage_mult(level) * (1 + sum_k scaling_k * scaling_mult_k(level) * curve(stat_k))
+    and 0.6 * base * damage_mult(level) when a stat that scales that type is below its requirement.
+    """
+    tables = weapons.tables
+    rows = np.arange(len(weapons)) if rows is None else np.asarray(rows, dtype=np.intp)
+    stats = np.clip(np.asarray(stats, dtype=np.intp), 0, tables.max_stat)
+    reinf = weapons.reinf[rows]
+    level_idx = tables.level_index(reinf, levels)                            # (W, L)
+
+    damage_mult = tables.reinf_damage[reinf[:, None], level_idx]             # (W, L, T)
+    scaling_mult = tables.reinf_scaling[reinf[:, None], level_idx]           # (W, L, K)
+    curve = tables.graphs[weapons.graph[rows][:, :, None, None], stats[None, None, :, :]]  # (W, T, P, K)
+
+    bonus = np.einsum('wtk,wlk,wtpk->wlpt', weapons.scaling[rows], scaling_mult, curve)
+    base = weapons.base[rows][:, None, :] * damage_mult                      # (W, L, T)
+
+    unmet = stats[None, :, :] < weapons.requirements[rows][:, None, :]        # (W, P, K)
+    penalised = (unmet[:, None, :, :] & weapons.applies[rows][:, :, None, :]).any(axis=-1)  # (W, T, P)
+    penalised = penalised.transpose(0, 2, 1)[:, None, :, :]                  # (W, 1, P, T)
+
+    return np.where(penalised, base[:, :, None, :] * (1 - REQUIREMENT_PENALTY), base[:, :, None, :] * (1 + bonus))
+
+
+# ------------------------------
+# Precomputed tables (manage.py build_ar_tables), memory-mapped
+# ------------------------------
+# One directory per WeaponTable digest under settings.AR_TABLE_DIR; plain .npy files so every
+# worker maps the same page-cache copy:
+#   item_id.npy        int64   (W,)
+#   base.npy           float32 (W, level, T)               base damage at each +0..+25 level
+#   bonus.npy          float32 (W, level, K, stat 0..150, T) scaling bonus contributed by stat K
+#   requirements.npy   int32   (W, K)
+#   applies.npy        bool    (W, T, K)                   does stat K scale damage type T
+#   manifest.json
+# AR = base + sum_k bonus[k, stat_k], or 0.6 * base for a type whose scaling stat is below requirement.
+KEEP_TABLES = 2
+
+
+def table_path(digest):
+    return os.path.join(settings.AR_TABLE_DIR, digest[:16])
+
+
+def write_ar_tables(weapons, chunk=32):
+    """Precompute the lookup tables for `weapons` and return their directory."""
+    tables = weapons.tables
+    path = table_path(weapons.digest)
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    n, T, K = len(weapons), len(DAMAGE_TYPES), len(SCALING_STATS)
+    levels = np.arange(MAX_LEVEL + 1)
+    stat_values = tables.max_stat + 1
+    base_out = np.lib.format.open_memmap(os.path.join(tmp, "base.npy"), mode="w+", dtype=np.float32,
+                                         shape=(n, len(levels), T))
+    bonus_out = np.lib.format.open_memmap(os.path.join(tmp, "bonus.npy"), mode="w+", dtype=np.float32,
+                                          shape=(n, len(levels), K, stat_values, T))
+    for start in range(0, n, chunk):
+        rows = np.arange(start, min(start + chunk, n))
+        reinf = weapons.reinf[rows]
+        level_idx = tables.level_index(reinf, levels)
+        base = weapons.base[rows][:, None, :] * tables.reinf_damage[reinf[:, None], level_idx]   # (w, L, T)
+        scaling_mult = tables.reinf_scaling[reinf[:, None], level_idx]                         # (w, L, K)
+        curve = tables.graphs[weapons.graph[rows]]                                             # (w, T, S)
+        base_out[rows] = base
+        bonus_out[rows] = np.einsum(
+            'wlt,wtk,wlk,wts->wlkst', base, weapons.scaling[rows], scaling_mult, curve,
+        )
+    base_out.flush()
+    bonus_out.flush()
+    del base_out, bonus_out
+
+    np.save(os.path.join(tmp, "item_id.npy"), weapons.ids)
+    np.save(os.path.join(tmp, "requirements.npy"), weapons.requirements)
+    np.save(os.path.join(tmp, "applies.npy"), weapons.applies)
+    manifest = {
+        "digest": weapons.digest,
+        "created": time.time(),
+        "weapons": n,
+        "levels": len(levels),
+        "stat_values": stat_values,
+        "damage_types": DAMAGE_TYPES,
+        "scaling_stats": SCALING_STATS,
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+    built = sorted(
+        (d for d in os.listdir(settings.AR_TABLE_DIR) if not d.endswith(".tmp")),
+        key=lambda d: os.path.getmtime(os.path.join(settings.AR_TABLE_DIR, d)),
+    )
+    for old in built[:-KEEP_TABLES]:
+        if old != os.path.basename(path):
+            shutil.rmtree(os.path.join(settings.AR_TABLE_DIR, old), ignore_errors=True)
+    return path
+
+
+class ARTables:
+    """Read-only, memory-mapped view of one table directory; lookups are gathers, no curve math."""
+
+    def __init__(self, path):
+        load = lambda name: np.load(os.path.join(path, name), mmap_mode="r")
+        self.path = path
+        self.ids = np.asarray(load("item_id.npy"))
+        self.base = load("base.npy")
+        self.bonus = load("bonus.npy")
+        self.requirements = np.asarray(load("requirements.npy"))
+        self.applies = np.asarray(load("applies.npy"))
+        self.row_of = {item_id: i for i, item_id in enumerate(self.ids.tolist())}
+        self.max_stat = self.bonus.shape[3] - 1
+        self._stat_axis = np.arange(self.bonus.shape[2])
+
+    def lookup(self, rows, level, stats):
+        """(W, T) AR of weapon rows at one +0..+25 level for one (K,) stat vector."""
+        rows = np.asarray(rows, dtype=np.intp)
+        stats = np.clip(np.asarray(stats, dtype=np.intp), 0, self.max_stat)
+        base = self.base[rows, level]                                                   # (W, T)
+        bonus = self.bonus[rows[:, None], level, self._stat_axis[None, :], stats[None, :]].sum(axis=1)
+        unmet = stats[None, :] < self.requirements[rows]                                # (W, K)
+        penalised = (unmet[:, None, :] & self.applies[rows]).any(axis=-1)               # (W, T)
+        return np.where(penalised, base * (1 - REQUIREMENT_PENALTY), base + bonus)
+
+
+_ar_tables = {}
+
+
+def get_ar_tables(weapons):
+    """Mapped tables matching `weapons`, or None when build_ar_tables hasn't been run for this data."""
+    found = _ar_tables.get(weapons.digest)
+    if found is None:
+        path = table_path(weapons.digest)
+        if not os.path.exists(os.path.join(path, "manifest.json")):
+            return None
+        found = ARTables(path)
+        _ar_tables.clear()
+        _ar_tables[weapons.digest] = found
+    return found
+
+
+def rank_weapons(stats, level=MAX_LEVEL, two_handed=False, item_types=None, limit=20):
+    """Weapons by total AR for one stat profile at one upgrade level, best first."""
+    weapons = get_weapon_table()
+    rows = np.arange(len(weapons))
+    if item_types:
+        wanted = set(item_types)
+        rows = np.asarray([i for i, t in enumerate(weapons.types) if t in wanted], dtype=np.intp)
+    if not len(rows):
+        return []
+
+    stat_vector = stat_matrix([stats], two_handed)
+    precomputed = get_ar_tables(weapons)
+    if precomputed is not None:
+        ar = precomputed.lookup(rows, level, stat_vector[0])
+    else:
+        ar = attack_rating(weapons, [level], stat_vector, rows)[:, 0, 0, :]  # (W, T)
+    totals = ar.sum(axis=1)
+    order = np.lexsort((weapons.ids[rows], -totals))[:limit]
+    return [
+        {
+            'id': int(weapons.ids[rows[i]]),
+            'name': weapons.names[rows[i]],
+            'type': weapons.types[rows[i]],
+            'attack_rating': {
+                **{t: int(np.floor(v)) for t, v in zip(DAMAGE_TYPES, ar[i])},
+                'total': int(np.floor(ar[i]).sum()),
+            },
+        }
+        for i in order
+    ]
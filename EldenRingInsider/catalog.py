@@ -0,0 +1,226 @@
+# EldenRingInsider/catalog.py
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .eligibility import RequirementMatrix
+from .models import Item
+
+# Display / sort order of item types on the item list
+ITEM_TYPE_ORDER = [
+    'katana', 'great_katana', 'colossal_sword', 'colossal_weapon', 'curved_sword', 'straightsword', 'greatsword',
+    'dagger', 'twinblade', 'axe', 'great_axe', 'hammer', 'great_hammer', 'flail', 'spear',
+    'short_spear', 'great_spear', 'halberd', 'heavy_thrusting_sword', 'thrusting_sword', 'claw', 'fists',
+    'backhand_blade', 'reaper', 'whip',
+    'small_shield', 'medium_shield', 'greatshield',
+    'staff', 'glintstone_staff', 'sacred_seal',
+    'ballista', 'crossbow', 'bow', 'light_bow', 'greatbow',
+    'torch',
+    'armor', 'spell', 'incantation', 'sorcery', 'talisman', 'ash_of_war', 'consumable', 'other',
+]
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+# How long (seconds) a worker trusts the stamp it last read before asking the cache again. Bumps made
+# by this process are seen at once; other processes' bumps within this window.
+CATALOG_VERSION_TTL = getattr(settings, 'CATALOG_VERSION_TTL', 1.0)
+
+# only the columns the snapshot needs (skips attack_power / defense / scaling JSON)
+_SNAPSHOT_FIELDS = ('id', 'name', 'type', 'description', 'image_url', 'effects', 'weight', 'required_stats')
+
+
+class CatalogItem(NamedTuple):
+    """
+    Compact, read-only view of an Item row.
+    `text` is "name description" lower-cased; `required_stats` is already parsed into {stat: int}.
+    `row` is the record's position in the snapshot (and in its requirement matrix).
+    """
+    id: int
+    name: str
+    type: str
+    name_lower: str
+    text: str
+    required_stats: dict
+    weight: float
+    image_url: str
+    effects: str
+    row: int
+
+
+def parse_required_stats(req):
+    """
+    Normalise a required_stats JSON value into {lowercase stat: int}.
+    Non-int values are dropped (the old per-item check ignored them too).
+    """
+    parsed = {}
+    if not req:
+        return parsed
+    try:
+        pairs = dict(req).items()
+    except (TypeError, ValueError):
+        return parsed
+    for k, v in pairs:
+        if k is None:
+            continue
+        try:
+            parsed[str(k).lower()] = int(v)
+        except (TypeError, ValueError):
+            continue
+    return parsed
+
+
+class CatalogSnapshot:
+    """
+    Immutable in-memory copy of the Item table, grouped by type.
+    Built once per catalog version and shared by every request in the process.
+    """
+
+    def __init__(self, version, records):
+        self.version = version
+        self.by_id = {r.id: r for r in records}
+        by_type = {}
+        for r in records:
+            by_type.setdefault(r.type, []).append(r)
+        self.by_type = {t: tuple(rs) for t, rs in by_type.items()}
+        self._unions = {}
+        self._serialized = {}
+        self._requirements = None
+        self._lock = threading.Lock()
+
+    @property
+    def requirements(self):
+        """RequirementMatrix over every record, built on first use."""
+        if self._requirements is None:
+            with self._lock:
+                if self._requirements is None:
+                    self._requirements = RequirementMatrix(list(self.by_id.values()))
+        return self._requirements
+
+    def of_type(self, item_type):
+        return self.by_type.get(item_type, ())
+
+    def of_types(self, item_types):
+        """
+        All records whose type is in `item_types`, in id order (same order the old querysets returned).
+        Unions are memoised per snapshot.
+        """
+        key = tuple(sorted(set(item_types)))
+        found = self._unions.get(key)
+        if found is None:
+            merged = [r for t in key for r in self.by_type.get(t, ())]
+            merged.sort(key=lambda r: r.id)
+            found = tuple(merged)
+            with self._lock:
+                self._unions[key] = found
+        return found
+
+    def serialized(self, key, build):
+        """Bytes derived from this snapshot (e.g. a response body), built once per key by `build()`."""
+        found = self._serialized.get(key)
+        if found is None:
+            found = build()
+            with self._lock:
+                self._serialized[key] = found
+        return found
+
+    def __len__(self):
+        return len(self.by_id)
+
+
+# ------------------------------
+# Version stamp
+# ------------------------------
+def _new_version():
+    # "<unix seconds>-<random>": unique, and tells us when the catalog last changed
+    return f"{int(time.time())}-{uuid.uuid4().hex}"
+
+
+# (version, monotonic deadline) of the stamp this process last read or wrote
+_local_version = (None, 0.0)
+
+
+def _remember(version):
+    global _local_version
+    _local_version = (version, time.monotonic() + CATALOG_VERSION_TTL)
+    return version
+
+
+def get_catalog_version():
+    """The shared version stamp, memoised in-process for CATALOG_VERSION_TTL seconds."""
+    version, deadline = _local_version
+    if version is not None and time.monotonic() < deadline:
+        return version
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _new_version(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return _remember(version)
+
+
+def get_catalog_last_modified(version=None):
+    """When the catalog version was stamped (UTC, second precision)."""
+    version = version or get_catalog_version()
+    try:
+        seconds = int(str(version).split('-', 1)[0])
+    except ValueError:
+        seconds = 0
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def bump_catalog_version():
+    """Mark every snapshot (in every worker sharing the cache) as stale."""
+    version = _new_version()
+    cache.set(CATALOG_VERSION_KEY, version, None)
+    _remember(version)
+
+
+# ------------------------------
+# Snapshot loading
+# ------------------------------
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def _load_records():
+    records = []
+    for row in Item.objects.order_by('id').values_list(*_SNAPSHOT_FIELDS):
+        item_id, name, item_type, description, image_url, effects, weight, required_stats = row
+        name = name or ''
+        name_lower = name.lower()
+        records.append(CatalogItem(
+            id=item_id,
+            name=name,
+            type=item_type,
+            name_lower=name_lower,
+            text=f"{name_lower} {(description or '').lower()}",
+            required_stats=parse_required_stats(required_stats),
+            weight=weight,
+            image_url=image_url,
+            effects=effects,
+            row=len(records),
+        ))
+    return records
+
+
+def get_catalog(version=None):
+    """
+    Return the current CatalogSnapshot, rebuilding it when the version stamp has moved.
+    A hit costs at most one cache lookup per CATALOG_VERSION_TTL; pass `version` when the caller
+    has already read it.
+    """
+    global _snapshot
+    version = version or get_catalog_version()
+    snap = _snapshot
+    if snap is not None and snap.version == version:
+        return snap
+    with _snapshot_lock:
+        snap = _snapshot
+        if snap is None or snap.version != version:
+            snap = CatalogSnapshot(version, _load_records())
+            _snapshot = snap
+    return snap
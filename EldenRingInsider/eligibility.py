@@ -0,0 +1,80 @@
+# EldenRingInsider/eligibility.py
+import numpy as np
+
+# Stats that gate equipment, in matrix column order
+REQUIREMENT_STATS = ('strength', 'dexterity', 'intelligence', 'faith', 'arcane')
+
+# Short / alternate spellings seen in older data and user input
+STAT_ALIASES = {
+    'str': 'strength',
+    'dex': 'dexterity',
+    'int': 'intelligence',
+    'fai': 'faith',
+    'arc': 'arcane',
+}
+
+# user values that can't be read as ints never block an item (same as meets_required_stats)
+_ALWAYS_MET = np.iinfo(np.int32).max
+
+
+def canonical_stat(key):
+    key = str(key).lower()
+    return STAT_ALIASES.get(key, key)
+
+
+class RequirementMatrix:
+    """
+    One row per catalog record, one column per required stat.
+    `mask(stats)` answers "can this user equip it?" for the whole catalog with a single comparison.
+
+    Records must expose `row` (their position) and a parsed `required_stats` dict.
+    Requirement keys outside the five main stats get extra columns so they are still enforced.
+    """
+
+    def __init__(self, records):
+        extra = sorted({
+            canonical_stat(k) for r in records for k in r.required_stats
+        } - set(REQUIREMENT_STATS))
+        self.columns = REQUIREMENT_STATS + tuple(extra)
+        col_index = {c: i for i, c in enumerate(self.columns)}
+
+        matrix = np.zeros((len(records), len(self.columns)), dtype=np.int32)
+        for r in records:
+            for k, v in r.required_stats.items():
+                col = col_index[canonical_stat(k)]
+                matrix[r.row, col] = max(matrix[r.row, col], v)
+        self.matrix = matrix
+
+    def stat_vector(self, stats):
+        """User stats as a column-aligned int vector; keys are matched case-insensitively."""
+        normalised = {}
+        for k, v in stats.items():
+            if k is None:
+                continue
+            normalised.setdefault(canonical_stat(k), v)
+        vec = np.empty(len(self.columns), dtype=np.int32)
+        for i, col in enumerate(self.columns):
+            try:
+                vec[i] = int(normalised.get(col, 0))
+            except (TypeError, ValueError):
+                vec[i] = _ALWAYS_MET
+        return vec
+
+    def mask(self, stats):
+        """Boolean array indexed by record row: True when every requirement is met."""
+        return (self.matrix <= self.stat_vector(stats)).all(axis=1)
+
+    def masks(self, stats_list):
+        """Eligibility for many stat profiles at once: shape (len(stats_list), n_records)."""
+        if not stats_list:
+            return np.zeros((0, len(self.matrix)), dtype=bool)
+        vecs = np.stack([self.stat_vector(s) for s in stats_list])
+        return (self.matrix[None, :, :] <= vecs[:, None, :]).all(axis=2)
+
+
+def eligible(records, mask):
+    """Filter `records` down to those whose row is set in `mask`, keeping their order."""
+    if not records:
+        return []
+    rows = np.fromiter((r.row for r in records), dtype=np.intp, count=len(records))
+    return [records[i] for i in np.flatnonzero(mask[rows])]
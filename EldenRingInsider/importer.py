@@ -0,0 +1,173 @@
+# EldenRingInsider/importer.py
+import hashlib
+import json
+import time
+
+from django.db import transaction
+
+from .catalog import bump_catalog_version
+from .models import Item, ItemType
+
+# Fields re-synced on items that already exist; everything else (images, locations, ...) is
+# only written when the item is first created, so manual edits survive a re-import.
+# attack_power is re-synced so rows imported before it carried reinforcement_id pick it up.
+UPDATE_FIELDS = ('type', 'effects', 'attack_power')
+
+
+def content_hash(values):
+    raw = json.dumps(values, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _field_values(values):
+    # compare what the database would store (e.g. CharField turns an effects dict into its str)
+    return [Item._meta.get_field(f).to_python(v) for f, v in zip(UPDATE_FIELDS, values)]
+
+
+def row_hash(obj):
+    return content_hash(_field_values([getattr(obj, f) for f in UPDATE_FIELDS]))
+
+
+def _attack_power(data):
+    # ERDB keeps the upgrade path next to attack_power; the AR engine reads it from there
+    attack_power = dict(data.get("attack_power") or {})
+    if attack_power and data.get("reinforcement_id") is not None:
+        attack_power["reinforcement_id"] = data["reinforcement_id"]
+    return attack_power
+
+
+class FileReport:
+    """Per-file outcome of an import run."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.total = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.seconds = 0.0
+        self.unmapped = []
+
+    def __str__(self):
+        return (f"{self.filename}: {self.total} records, {self.created} created, {self.updated} updated, "
+                f"{self.unchanged} unchanged in {self.seconds * 1000:.0f} ms")
+
+
+class BulkItemImporter:
+    """
+    Bulk upsert of ERDB records into Item.
+
+    Existing items are loaded once (keyed by erdb_id) and diffed by a hash of UPDATE_FIELDS;
+    new items go out through batched bulk_create(update_conflicts=...), changed ones through
+    bulk_update. Call `apply()` inside a transaction (see `import_files`).
+    """
+
+    def __init__(self, to_item_type, batch_size=500):
+        self.to_item_type = to_item_type
+        self.batch_size = batch_size
+        self.existing = {}  # erdb_id -> [pk, hash]
+        self.pending_new = {}  # erdb_id -> unsaved Item (not yet written)
+        self.changed = False
+
+    def load_existing(self):
+        rows = Item.objects.filter(erdb_id__isnull=False).values_list('erdb_id', 'pk', *UPDATE_FIELDS)
+        self.existing = {erdb_id: [pk, content_hash(_field_values(values))] for erdb_id, pk, *values in rows}
+
+    def build_item(self, data):
+        """Unsaved Item for one ERDB record (same field mapping the per-row importer used)."""
+        erdb_category = data.get("category", "").strip()
+        item_type = self.to_item_type(erdb_category)
+
+        # Handle effects
+        effects = None
+        if item_type in [ItemType.TALISMAN, ItemType.SPELL, ItemType.SORCERY, ItemType.INCANTATION, ItemType.ASH_OF_WAR]:
+            effects_data = data.get("effects", [])
+            if effects_data and isinstance(effects_data, list):
+                effects = effects_data[0] if effects_data else None
+
+        return Item(
+            erdb_id=str(data.get("id")),
+            name=data.get("name", "Unnamed"),
+            type=item_type,
+            description="\n".join(data.get("description", [])),
+            image_url=f"https://example.com/images/{data.get('icon', '')}.png",
+            icon=data.get("icon", ""),
+            weight=data.get("weight", 0),
+            effects=effects,
+            required_stats=data.get("requirements", {}),
+            scaling=data.get("scaling", {}),
+            attack_power=_attack_power(data),
+            defense=data.get("defense", {}),
+            fp_cost=data.get("fp_cost", 0),
+        )
+
+    def apply(self, filename, records):
+        """Diff `records` against the database and write the difference. Returns a FileReport."""
+        report = FileReport(filename)
+        started = time.perf_counter()
+        to_create, to_update = [], {}
+
+        for data in records:
+            report.total += 1
+            obj = self.build_item(data)
+            if obj.type == ItemType.OTHER:
+                report.unmapped.append((data.get("category", ""), data.get("name")))
+
+            if obj.erdb_id in self.pending_new:
+                # repeated id within this run: later records only refresh UPDATE_FIELDS
+                first = self.pending_new[obj.erdb_id]
+                for f in UPDATE_FIELDS:
+                    setattr(first, f, getattr(obj, f))
+                report.unchanged += 1
+                continue
+
+            known = self.existing.get(obj.erdb_id)
+            if known is None:
+                self.pending_new[obj.erdb_id] = obj
+                to_create.append(obj)
+                continue
+
+            new_hash = row_hash(obj)
+            if known[1] == new_hash:
+                report.unchanged += 1
+                continue
+            obj.pk = known[0]
+            known[1] = new_hash
+            to_update[obj.pk] = obj
+
+        if to_create:
+            Item.objects.bulk_create(
+                to_create,
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=['erdb_id'],
+                update_fields=list(UPDATE_FIELDS),
+            )
+            report.created = len(to_create)
+        if to_update:
+            Item.objects.bulk_update(list(to_update.values()), list(UPDATE_FIELDS), batch_size=self.batch_size)
+            report.updated = len(to_update)
+
+        # created rows are now "existing" for any later file in the same run
+        for obj in to_create:
+            if obj.pk is not None:
+                self.existing[obj.erdb_id] = [obj.pk, row_hash(obj)]
+        self.pending_new.clear()
+
+        self.changed = self.changed or bool(to_create or to_update)
+        report.seconds = time.perf_counter() - started
+        return report
+
+
+def import_files(parsed_files, to_item_type, batch_size=500):
+    """
+    Import [(filename, records), ...] in one transaction.
+    Bulk writes skip model signals, so the catalog version is bumped once at the end.
+    """
+    importer = BulkItemImporter(to_item_type, batch_size=batch_size)
+    with transaction.atomic():
+        importer.load_existing()
+        reports = [importer.apply(filename, records) for filename, records in parsed_files]
+    if importer.changed:
+        bump_catalog_version()
+    return reports
@@ -0,0 +1,35 @@
+# EldenRingInsider/management/commands/build_ar_tables.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from EldenRingInsider.attack_rating import get_ar_tables, get_weapon_table, table_path, write_ar_tables
+
+
+class Command(BaseCommand):
+    help = 'Precompute memory-mapped attack-rating tables (weapon x upgrade level x stat value) for the AR endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report whether tables for the current game data and weapons exist')
+
+    def handle(self, *args, **options):
+        weapons = get_weapon_table()
+        path = table_path(weapons.digest)
+        if weapons.unscored:
+            self.stdout.write(self.style.WARNING(
+                f"Skipping {len(weapons.unscored)} weapons without a known reinforcement_id "
+                f"(re-run import_erdb with armaments.json)"
+            ))
+        if options['check']:
+            if get_ar_tables(weapons) is not None:
+                self.stdout.write(self.style.SUCCESS(f"Up to date: {path}"))
+            else:
+                self.stdout.write(self.style.WARNING(f"Missing: {path}"))
+            return
+
+        started = time.perf_counter()
+        path = write_ar_tables(weapons)
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {len(weapons)} weapons to {path} in {time.perf_counter() - started:.2f}s"
+        ))
@@ -3,7 +3,8 @@
 import json
 import os
 from django.core.management.base import BaseCommand
-from EldenRingInsider.models import Item, ItemType
+from EldenRingInsider.importer import import_files
+from EldenRingInsider.models import ItemType
 
 # Map ERDB categories to your ItemType choices
 ERDB_TO_ITEMTYPE = {
@@ -55,8 +56,8 @@ ERDB_TO_ITEMTYPE = {
 
     # Spells
     "Sacred Seal": ItemType.SACRED_SEAL,
-    "Sorcery": ItemType.SPELL,
-    "Incantation": ItemType.SPELL,
+    "Sorcery": ItemType.SORCERY,
+    "Incantation": ItemType.INCANTATION,
 
     # Ashes of War
     "Ash Of War": ItemType.ASH_OF_WAR,
@@ -70,7 +71,11 @@ ERDB_TO_ITEMTYPE = {
 class Command(BaseCommand):
     help = 'Import Elden Ring items from ERDB-generated JSON files, preserving manual images/locations.'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Rows per bulk INSERT / UPDATE statement')
+
+    def handle(self, *args, **options):
         data_dir = os.path.join("data", "1.10.0")
 
         target_files = [
@@ -81,79 +86,34 @@ class Command(BaseCommand):
             "spells.json",
         ]
 
-
-
+        # Parse everything first so a bad file is reported without touching the database
+        parsed_files = []
         for filename in target_files:
             file_path = os.path.join(data_dir, filename)
-
             try:
                 with open(file_path, "r", encoding="utf-8") as f:
                     raw_data = json.load(f)
-
                 items = list(raw_data.values()) if isinstance(raw_data, dict) else raw_data
-
-                for data in items:
-                    erdb_id = str(data.get("id"))
-
-                    # Get and clean category
-                    erdb_category = data.get("category", "").strip()
-
-                    # Map to item type
-                    item_type = ERDB_TO_ITEMTYPE.get(erdb_category, ItemType.OTHER)
-
-                    # Debug unmapped categories
-                    if item_type == ItemType.OTHER:
-                        print(f"⚠️ Unmapped category: '{erdb_category}' for item: {data.get('name')}")
-
-                    # Extract stats
-                    scaling = data.get("scaling", {})
-                    attack_power = data.get("attack_power", {})
-                    defense = data.get("defense", {})
-
-                    # Handle effects
-                    effects = None
-                    if item_type in [ItemType.TALISMAN, ItemType.SPELL, ItemType.ASH_OF_WAR]:
-                        effects_data = data.get("effects", [])
-                        if effects_data and isinstance(effects_data, list):
-                            effects = effects_data[0] if effects_data else None
-
-                    # Get or create item
-                    obj, created = Item.objects.get_or_create(
-                        erdb_id=erdb_id,
-                        defaults={
-                            "name": data.get("name", "Unnamed"),
-                            "type": item_type,
-                            "description": "\n".join(data.get("description", [])),
-                            "image_url": f"https://example.com/images/{data.get('icon', '')}.png",
-                            "icon": data.get("icon", ""),
-                            "weight": data.get("weight", 0),
-                            "effects": effects,
-                            "required_stats": data.get("requirements", {}),
-                            "scaling": scaling,
-                            "attack_power": attack_power,
-                            "defense": defense,
-                            "fp_cost": data.get("fp_cost", 0),
-                        }
-                    )
-
-                    # Update existing items
-                    if not created:
-                        update_fields = []
-                        if obj.type != item_type:
-                            obj.type = item_type
-                            update_fields.append("type")
-                        if obj.effects != effects:
-                            obj.effects = effects
-                            update_fields.append("effects")
-
-                        if update_fields:
-                            obj.save(update_fields=update_fields)
-
-                self.stdout.write(self.style.SUCCESS(f"✅ {filename} imported ({len(items)} items)"))
-
+                parsed_files.append((filename, items))
             except FileNotFoundError:
                 self.stdout.write(self.style.WARNING(f"⚠️ File not found: {file_path}"))
             except json.JSONDecodeError:
                 self.stdout.write(self.style.ERROR(f"❌ Invalid JSON in {file_path}"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ {filename} failed: {str(e)}"))
+
+        try:
+            reports = import_files(
+                parsed_files,
+                lambda category: ERDB_TO_ITEMTYPE.get(category, ItemType.OTHER),
+                batch_size=options['batch_size'],
+            )
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f"❌ Import failed, nothing was written: {str(e)}"))
+            return
+
+        for report in reports:
+            # Debug unmapped categories
+            for category, name in report.unmapped:
+                print(f"⚠️ Unmapped category: '{category}' for item: {name}")
+            self.stdout.write(self.style.SUCCESS(f"✅ {report}"))
+        total = sum(r.seconds for r in reports)
+        self.stdout.write(self.style.SUCCESS(f"Done in {total * 1000:.0f} ms"))
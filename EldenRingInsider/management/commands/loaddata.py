@@ -0,0 +1,18 @@
+# EldenRingInsider/management/commands/loaddata.py
+from django.core.management.commands import loaddata
+
+from EldenRingInsider.catalog import bump_catalog_version
+from EldenRingInsider.presets import bump_presets_version
+
+
+class Command(loaddata.Command):
+    """
+    Django's loaddata, plus one catalog / presets version bump once the fixture is committed.
+    The model signals skip raw saves, so a large fixture doesn't stamp the versions once per row.
+    """
+
+    def handle(self, *fixture_labels, **options):
+        super().handle(*fixture_labels, **options)
+        if self.loaded_object_count:
+            bump_catalog_version()
+            bump_presets_version()
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:23
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import OperationalError, migrations
+
+# The search index SQL is frozen here rather than imported from EldenRingInsider.search, so later
+# edits to that module can't change what this migration did. Changing the index needs a new migration.
+
+# Postgres: stored tsvector maintained by a trigger
+PG_CREATE_SQL = """
+CREATE OR REPLACE FUNCTION eldenringinsider_item_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.effects, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.location, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS eldenringinsider_item_search_vector ON "EldenRingInsider_item";
+CREATE TRIGGER eldenringinsider_item_search_vector
+    BEFORE INSERT OR UPDATE ON "EldenRingInsider_item"
+    FOR EACH ROW EXECUTE FUNCTION eldenringinsider_item_search_vector();
+
+UPDATE "EldenRingInsider_item" SET id = id;
+"""
+
+PG_DROP_SQL = """
+DROP TRIGGER IF EXISTS eldenringinsider_item_search_vector ON "EldenRingInsider_item";
+DROP FUNCTION IF EXISTS eldenringinsider_item_search_vector();
+"""
+
+# SQLite: external-content FTS5 table kept in sync by triggers
+SQLITE_CREATE_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS "EldenRingInsider_item_fts" USING fts5(
+        name, effects, description, location, content='EldenRingInsider_item', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS "EldenRingInsider_item_fts_ai" AFTER INSERT ON "EldenRingInsider_item" BEGIN
+        INSERT INTO "EldenRingInsider_item_fts"(rowid, name, effects, description, location)
+            VALUES (new.id, new.name, new.effects, new.description, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS "EldenRingInsider_item_fts_ad" AFTER DELETE ON "EldenRingInsider_item" BEGIN
+        INSERT INTO "EldenRingInsider_item_fts"("EldenRingInsider_item_fts", rowid, name, effects, description, location)
+            VALUES ('delete', old.id, old.name, old.effects, old.description, old.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS "EldenRingInsider_item_fts_au" AFTER UPDATE ON "EldenRingInsider_item" BEGIN
+        INSERT INTO "EldenRingInsider_item_fts"("EldenRingInsider_item_fts", rowid, name, effects, description, location)
+            VALUES ('delete', old.id, old.name, old.effects, old.description, old.location);
+        INSERT INTO "EldenRingInsider_item_fts"(rowid, name, effects, description, location)
+            VALUES (new.id, new.name, new.effects, new.description, new.location);
+    END""",
+    """INSERT INTO "EldenRingInsider_item_fts"("EldenRingInsider_item_fts") VALUES ('rebuild')""",
+]
+
+SQLITE_DROP_SQL = [
+    'DROP TRIGGER IF EXISTS "EldenRingInsider_item_fts_ai"',
+    'DROP TRIGGER IF EXISTS "EldenRingInsider_item_fts_ad"',
+    'DROP TRIGGER IF EXISTS "EldenRingInsider_item_fts_au"',
+    'DROP TABLE IF EXISTS "EldenRingInsider_item_fts"',
+]
+
+
+def forwards(apps, schema_editor):
+    """Create the vendor-specific index + sync triggers and fill them from existing rows."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(PG_CREATE_SQL)
+    elif vendor == 'sqlite':
+        try:
+            for sql in SQLITE_CREATE_SQL:
+                schema_editor.execute(sql)
+        except OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE filters
+            pass
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(PG_DROP_SQL)
+    elif vendor == 'sqlite':
+        for sql in SQLITE_DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EldenRingInsider', '0016_alter_build_name'),
+    ]
+
+    operations = [
+        # no-op outside Postgres
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='item',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='item_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='item_name_trgm_gin', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 12:26
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def dedupe_erdb_ids(apps, schema_editor):
+    """
+    Collapse items sharing an erdb_id onto the oldest row (lowest id) so the constraint can be added:
+    equipment slots pointing at a duplicate are moved to the survivor, then the duplicates go.
+    Blank ids are not ERDB ids at all; they become NULL (which the constraint allows repeatedly).
+    """
+    Item = apps.get_model('EldenRingInsider', 'Item')
+    EquipmentSlot = apps.get_model('EldenRingInsider', 'EquipmentSlot')
+    db = schema_editor.connection.alias
+
+    Item.objects.using(db).filter(erdb_id='').update(erdb_id=None)
+    repeated = (
+        Item.objects.using(db).filter(erdb_id__isnull=False)
+        .values('erdb_id').annotate(n=Count('id'), keep=Min('id')).filter(n__gt=1)
+    )
+    for group in repeated:
+        duplicates = Item.objects.using(db).filter(erdb_id=group['erdb_id']).exclude(pk=group['keep'])
+        EquipmentSlot.objects.using(db).filter(item__in=duplicates).update(item_id=group['keep'])
+        duplicates.delete()
+
+
+class Migration(migrations.Migration):
+    # the dedupe commits before the constraint is added (Postgres refuses ALTER TABLE with the
+    # deletes' FK checks still pending in the same transaction)
+    atomic = False
+
+    dependencies = [
+        ('EldenRingInsider', '0017_item_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_erdb_ids, migrations.RunPython.noop, atomic=True),
+        migrations.AddConstraint(
+            model_name='item',
+            constraint=models.UniqueConstraint(fields=('erdb_id',), name='unique_item_erdb_id'),
+        ),
+    ]
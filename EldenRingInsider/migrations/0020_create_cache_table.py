@@ -0,0 +1,20 @@
+# Creates the DatabaseCache table used by the default CACHES setting, so `migrate` is enough on deploy.
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # no-op for non-database backends and when the table already exists
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EldenRingInsider', '0019_item_type_sorcery_incantation'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
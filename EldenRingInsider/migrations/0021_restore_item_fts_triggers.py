@@ -0,0 +1,45 @@
+# Re-creates the SQLite FTS5 sync triggers from 0017. SQLite applies 0018's unique constraint by
+# rebuilding the Item table, which silently drops triggers on it, so the search index stopped
+# following Item writes. The index is rebuilt to pick up everything written since.
+
+from django.db import OperationalError, migrations
+
+SQLITE_TRIGGER_SQL = [
+    """CREATE TRIGGER IF NOT EXISTS "EldenRingInsider_item_fts_ai" AFTER INSERT ON "EldenRingInsider_item" BEGIN
+        INSERT INTO "EldenRingInsider_item_fts"(rowid, name, effects, description, location)
+            VALUES (new.id, new.name, new.effects, new.description, new.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS "EldenRingInsider_item_fts_ad" AFTER DELETE ON "EldenRingInsider_item" BEGIN
+        INSERT INTO "EldenRingInsider_item_fts"("EldenRingInsider_item_fts", rowid, name, effects, description, location)
+            VALUES ('delete', old.id, old.name, old.effects, old.description, old.location);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS "EldenRingInsider_item_fts_au" AFTER UPDATE ON "EldenRingInsider_item" BEGIN
+        INSERT INTO "EldenRingInsider_item_fts"("EldenRingInsider_item_fts", rowid, name, effects, description, location)
+            VALUES ('delete', old.id, old.name, old.effects, old.description, old.location);
+        INSERT INTO "EldenRingInsider_item_fts"(rowid, name, effects, description, location)
+            VALUES (new.id, new.name, new.effects, new.description, new.location);
+    END""",
+    """INSERT INTO "EldenRingInsider_item_fts"("EldenRingInsider_item_fts") VALUES ('rebuild')""",
+]
+
+
+def restore_triggers(apps, schema_editor):
+    # Postgres keeps its trigger across ALTER TABLE; SQLite without FTS5 never had the index
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        for sql in SQLITE_TRIGGER_SQL:
+            schema_editor.execute(sql)
+    except OperationalError:
+        pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EldenRingInsider', '0020_create_cache_table'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@
 
 from django.db import models
 from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 class ItemType(models.TextChoices):
     # Weapon sub categories
@@ -57,6 +58,8 @@ class ItemType(models.TextChoices):
 
     TALISMAN = 'talisman', 'Talisman'
     SPELL = 'spell', 'Spell'
+    SORCERY = 'sorcery', 'Sorcery'
+    INCANTATION = 'incantation', 'Incantation'
     ASH_OF_WAR = 'ash_of_war', 'Ash of War'
     CONSUMABLE = 'consumable', 'Consumable'
     OTHER = 'other', 'Other'
@@ -83,13 +86,23 @@ class Item(models.Model):
     # For armor: 'mage', 'melee', 'light', 'heavy', etc.
     role = models.CharField(max_length=32, blank=True, null=True)
 
+    # Postgres only: weighted tsvector over name/effects/description/location, kept up to date by a
+    # database trigger (see EldenRingInsider/search.py). SQLite uses an FTS5 shadow table instead.
+    search_vector = SearchVectorField(null=True, editable=False)
+
 
     class Meta:
         indexes = [
             models.Index(fields=['type']),
             models.Index(fields=['name']),
             GinIndex(fields=['attack_power']),
-            GinIndex(fields=['defense'])
+            GinIndex(fields=['defense']),
+            GinIndex(fields=['search_vector'], name='item_search_vector_gin'),
+            GinIndex(fields=['name'], name='item_name_trgm_gin', opclasses=['gin_trgm_ops']),
+        ]
+        constraints = [
+            # import_erdb upserts on erdb_id; NULLs (hand-made items) don't collide
+            models.UniqueConstraint(fields=['erdb_id'], name='unique_item_erdb_id'),
         ]
 
     def __str__(self):
@@ -0,0 +1,77 @@
+# EldenRingInsider/pagination.py
+import base64
+import json
+
+from django.db.models import Q
+
+
+class KeysetPage:
+    """
+    One page of a keyset (cursor) paginated queryset.
+    No COUNT and no OFFSET: the next page starts strictly after the last row's sort key.
+    """
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Return the decoded key tuple, or None for the first page (no cursor). Raises ValueError if malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('malformed cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('malformed cursor')
+    return values
+
+
+def _field(key):
+    return key.lstrip('-')
+
+
+def _after(keys, values):
+    # (k1, k2, ...) > (v1, v2, ...) spelled out as OR-of-ANDs; row-value comparison isn't portable in the ORM.
+    # '-key' sorts descending, so "after" means less-than for that key.
+    cond = Q()
+    for i, key in enumerate(keys):
+        prefix = {_field(keys[j]): values[j] for j in range(i)}
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        cond |= Q(**prefix, **{f'{_field(key)}__{lookup}': values[i]})
+    return cond
+
+
+def keyset_page(queryset, keys, cursor, per_page):
+    """
+    `queryset` must be ordered by `keys` (order_by syntax, '-' for descending) and the last key must be
+    unique (e.g. id). A malformed cursor raises ValueError.
+    Fetches per_page + 1 rows to know whether another page exists.
+    """
+    values = decode_cursor(cursor, len(keys))
+    if values is not None:
+        queryset = queryset.filter(_after(keys, values))
+    rows = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(getattr(rows[-1], _field(k)) for k in keys)
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,158 @@
+# EldenRingInsider/presets.py
+import csv
+import json
+import uuid
+from itertools import groupby
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import Build, EquipmentSlot
+
+# Slot codes in export / CSV column order (same order as the builds page)
+SLOT_CODES = [code for code, _ in EquipmentSlot.SLOT_CHOICES]
+
+_PRESET_COLUMNS = (
+    'id', 'name', 'description',
+    'equipment_slots__slot_name',
+    'equipment_slots__item_id',
+    'equipment_slots__item__name',
+    'equipment_slots__item__type',
+)
+
+
+# Bumped whenever builds/slots change; workers holding ML indexes compare it to decide whether
+# to pull new presets from the database (see chatbot/presets_sync.py).
+PRESETS_VERSION_KEY = 'presets:version'
+
+
+def get_presets_version():
+    version = cache.get(PRESETS_VERSION_KEY)
+    if version is None:
+        cache.add(PRESETS_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(PRESETS_VERSION_KEY)
+    return version
+
+
+def bump_presets_version():
+    cache.set(PRESETS_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def empty_slot():
+    return {"item_id": None, "item_name": None, "item_type": None}
+
+
+def iter_presets(queryset=None, chunk_size=2000):
+    """
+    Yield every build as {build_id, name, description, slots: {slot_code: {item_id, item_name, item_type}}}.
+    Uses a single LEFT JOIN query (one row per slot), streamed from the database cursor.
+    """
+    queryset = Build.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('id').values_list(*_PRESET_COLUMNS).iterator(chunk_size=chunk_size)
+    for build_id, build_rows in groupby(rows, key=lambda r: r[0]):
+        slots = {code: empty_slot() for code in SLOT_CODES}
+        name = description = None
+        for _, name, description, slot_name, item_id, item_name, item_type in build_rows:
+            if slot_name in slots:
+                slots[slot_name] = {"item_id": item_id, "item_name": item_name, "item_type": item_type}
+        yield {
+            "build_id": build_id,
+            "name": name,
+            "description": description,
+            "slots": slots,
+        }
+
+
+# ------------------------------
+# Writers (each consumes the iterator once and returns the number of builds written)
+# ------------------------------
+def write_json(presets, f, indent=2):
+    """JSON array, same shape as the old export, written one build at a time."""
+    count = 0
+    f.write('[')
+    for preset in presets:
+        f.write(',\n' if count else '\n')
+        f.write(json.dumps(preset, indent=indent))
+        count += 1
+    f.write('\n]' if count else ']')
+    return count
+
+
+def write_jsonl(presets, f):
+    count = 0
+    for preset in presets:
+        f.write(json.dumps(preset))
+        f.write('\n')
+        count += 1
+    return count
+
+
+def csv_header():
+    header = ['build_id', 'name', 'description']
+    for code in SLOT_CODES:
+        header += [f'{code}_item_id', code, f'{code}_item_type']
+    return header
+
+
+def csv_row(preset):
+    """One preset in csv_header() column order."""
+    row = [preset['build_id'], preset['name'], preset['description']]
+    for code in SLOT_CODES:
+        slot = preset['slots'][code]
+        row += [slot['item_id'], slot['item_name'], slot['item_type']]
+    return row
+
+
+def write_csv(presets, f):
+    """Wide layout used by ml_presets_*.csv: build_id,name,description,RH1_item_id,RH1,RH1_item_type,..."""
+    writer = csv.writer(f)
+    writer.writerow(csv_header())
+    count = 0
+    for preset in presets:
+        writer.writerow(csv_row(preset))
+        count += 1
+    return count
+
+
+def write_npz(presets, f):
+    """
+    Columnar binary export (NumPy .npz).
+    One int64 column per slot holding item ids (-1 = empty), plus build metadata columns and an
+    item lookup table (item_ids / item_names / item_types) so names are stored once.
+    """
+    build_ids, names, descriptions = [], [], []
+    slot_columns = {code: [] for code in SLOT_CODES}
+    items = {}
+    for preset in presets:
+        build_ids.append(preset['build_id'])
+        names.append(preset['name'] or '')
+        descriptions.append(preset['description'] or '')
+        for code in SLOT_CODES:
+            slot = preset['slots'][code]
+            item_id = slot['item_id']
+            slot_columns[code].append(-1 if item_id is None else item_id)
+            if item_id is not None and item_id not in items:
+                items[item_id] = (slot['item_name'] or '', slot['item_type'] or '')
+
+    item_ids = sorted(items)
+    np.savez_compressed(
+        f,
+        build_id=np.asarray(build_ids, dtype=np.int64),
+        name=np.asarray(names, dtype=str),
+        description=np.asarray(descriptions, dtype=str),
+        slot_codes=np.asarray(SLOT_CODES, dtype=str),
+        item_ids=np.asarray(item_ids, dtype=np.int64),
+        item_names=np.asarray([items[i][0] for i in item_ids], dtype=str),
+        item_types=np.asarray([items[i][1] for i in item_ids], dtype=str),
+        **{f'slot_{code}': np.asarray(values, dtype=np.int64) for code, values in slot_columns.items()},
+    )
+    return len(build_ids)
+
+
+# format -> (writer, default file name, open mode)
+EXPORT_FORMATS = {
+    'json': (write_json, 'build_presets_export.json', 'w'),
+    'jsonl': (write_jsonl, 'build_presets_export.jsonl', 'w'),
+    'csv': (write_csv, 'build_presets_export.csv', 'w'),
+    'npz': (write_npz, 'build_presets_export.npz', 'wb'),
+}
@@ -0,0 +1,108 @@
+# EldenRingInsider/search.py
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+# Fields covered by item search, with their relative weight
+#   Postgres: tsvector weights A-D       SQLite: bm25 column weights
+SEARCH_FIELDS = (
+    ('name', 'A', 10.0),
+    ('effects', 'B', 4.0),
+    ('description', 'C', 1.0),
+    ('location', 'D', 0.5),
+)
+
+ITEM_TABLE = 'EldenRingInsider_item'
+FTS_TABLE = 'EldenRingInsider_item_fts'
+
+# The Postgres tsvector trigger and the SQLite FTS5 table + sync triggers over SEARCH_FIELDS are
+# created by migration 0017; changing them needs a new migration. SQLite drops the triggers whenever
+# a migration rebuilds the Item table (most ALTERs there), so such a migration must re-create them
+# (see 0021).
+
+
+def rebuild_search_index():
+    """Recompute every item's search entry (e.g. after restoring a dump without triggers)."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'UPDATE "{ITEM_TABLE}" SET id = id')
+        elif fts_available():
+            cursor.execute(f"""INSERT INTO "{FTS_TABLE}"("{FTS_TABLE}") VALUES ('rebuild')""")
+
+
+_fts_available = {}
+
+
+def fts_available():
+    alias = connection.alias
+    if alias not in _fts_available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_available[alias] = cursor.fetchone() is not None
+    return _fts_available[alias]
+
+
+# ------------------------------
+# Querying
+# ------------------------------
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_match_expression(query):
+    """Turn free text into an FTS5 MATCH string: every word must match, as a prefix."""
+    tokens = _TOKEN_RE.findall(query.lower())
+    return ' '.join(f'"{t}"*' for t in tokens)
+
+
+def _postgres_search(queryset, query):
+    search_query = SearchQuery(query, search_type='websearch', config=PG_SEARCH_CONFIG)
+    return queryset.annotate(
+        rank=SearchRank(F('search_vector'), search_query) + TrigramSimilarity('name', query),
+    ).filter(
+        Q(search_vector=search_query) | Q(name__trigram_similar=query) | Q(name__istartswith=query)
+    )
+
+
+def _sqlite_search(queryset, query):
+    match = fts_match_expression(query)
+    if not match:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+    weights = ', '.join(str(w) for _, _, w in SEARCH_FIELDS)
+    # join the FTS table so MATCH runs once and ranking / keyset pagination stay in SQL;
+    # bm25() is "lower is better", so negate it into a score
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'"{FTS_TABLE}" MATCH %s', f'"{FTS_TABLE}".rowid = "{ITEM_TABLE}"."id"'],
+        params=[match],
+    ).annotate(rank=RawSQL(f'-bm25("{FTS_TABLE}", {weights})', [], output_field=FloatField()))
+
+
+def _fallback_search(queryset, query):
+    # the old item_list filter, ranked exact name > name prefix > description hit
+    return queryset.filter(
+        Q(name__iexact=query) |
+        Q(name__istartswith=query) |
+        Q(description__icontains=query)
+    ).annotate(
+        rank=Case(
+            When(name__iexact=query, then=Value(3.0)),
+            When(name__istartswith=query, then=Value(2.0)),
+            default=Value(1.0),
+            output_field=FloatField(),
+        )
+    )
+
+
+def search_items(queryset, query):
+    """
+    Filter an Item queryset down to matches for `query` and annotate each with `rank` (higher = better).
+    Ordering is left to the caller.
+    """
+    if connection.vendor == 'postgresql':
+        return _postgres_search(queryset, query)
+    if connection.vendor == 'sqlite' and fts_available():
+        return _sqlite_search(queryset, query)
+    return _fallback_search(queryset, query)
@@ -0,0 +1,31 @@
+# EldenRingInsider/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import bump_catalog_version
+from .models import Build, EquipmentSlot, Item
+from .presets import bump_presets_version
+
+
+# Item changes invalidate the in-memory catalog snapshot once the transaction commits, so no
+# worker rebuilds it from rows that may still roll back. Raw saves (loaddata) are skipped: the
+# loaddata command bumps both versions once when the fixture is in (import_erdb bumps itself).
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def invalidate_catalog(sender, **kwargs):
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(bump_catalog_version)
+
+
+# New/edited presets: announced once the transaction commits, so a worker that reacts
+# never reads a build whose slots aren't written yet.
+@receiver(post_save, sender=Build)
+@receiver(post_delete, sender=Build)
+@receiver(post_save, sender=EquipmentSlot)
+@receiver(post_delete, sender=EquipmentSlot)
+def announce_presets_change(sender, **kwargs):
+    if kwargs.get('raw'):
+        return
+    transaction.on_commit(bump_presets_version)
@@ -0,0 +1,199 @@
+# EldenRingInsider/spell_ranking.py
+import json
+import os
+import threading
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+
+from .catalog import get_catalog_version, parse_required_stats
+from .eligibility import RequirementMatrix
+from .models import Item, ItemType
+
+SPELLS_DATA = os.path.join(settings.BASE_DIR, "data", "1.10.0", "spells.json")
+
+# 'spell' is the type older imports gave both schools
+SPELL_TYPES = [ItemType.SPELL, ItemType.SORCERY, ItemType.INCANTATION]
+SPELL_KINDS = ('sorcery', 'incantation')
+
+DEFAULT_MEMORY_SLOTS = 4   # spell slots on the build page
+MAX_MEMORY_SLOTS = 14      # every memory stone + Moon of Nokstella
+
+# Feature columns; a spell's score is features @ weights(stats)
+#   power        sum of its requirements (spell tier), / catalog max
+#   fp           fp_cost + fp_cost_extra (full charge), / catalog max
+#   sp           stamina cost, / catalog max
+#   sorcery / incantation   school one-hots
+#   horseback    castable while mounted
+FEATURES = ('power', 'fp', 'sp', 'sorcery', 'incantation', 'horseback')
+W_POWER = 1.0
+W_FP = 0.5
+W_SP = 0.1
+W_HORSEBACK = 0.1
+
+
+class _SpellRequirements(NamedTuple):
+    # the record shape RequirementMatrix reads
+    row: int
+    required_stats: dict
+
+
+def spell_kind(item_type, category, required):
+    """'sorcery' or 'incantation', from the ERDB category, the item type, or failing both the requirements."""
+    category = (category or '').lower()
+    if category in SPELL_KINDS:
+        return category
+    if item_type in SPELL_KINDS:
+        return item_type
+    return 'incantation' if required.get('faith', 0) > required.get('intelligence', 0) else 'sorcery'
+
+
+class SpellTable:
+    """
+    Feature vectors, requirements and memory-slot costs of every spell in the catalog, computed once per
+    catalog version. Costs and slots come from spells.json (joined on erdb_id, then name); spells missing
+    there fall back to Item.fp_cost and one slot.
+    """
+
+    def __init__(self, version, records, spells_data):
+        self.version = version
+        by_id = {str(s["id"]): s for s in spells_data.values()}
+        by_name = {s["name"]: s for s in spells_data.values()}
+
+        n = len(records)
+        self.ids = np.asarray([r[0] for r in records], dtype=np.int64)
+        self.names = [r[1] for r in records]
+        self.kinds = []
+        self.slots = np.ones(n, dtype=np.intp)
+        self.fp = np.zeros(n)
+        raw = np.zeros((n, len(FEATURES)))
+        required_rows = []
+        for i, (_, name, item_type, erdb_id, required, fp_cost) in enumerate(records):
+            data = by_id.get(erdb_id) or by_name.get(name) or {}
+            required = parse_required_stats(data.get("requirements") or required)
+            kind = spell_kind(item_type, data.get("category"), required)
+            self.kinds.append(kind)
+            self.slots[i] = max(1, int(data.get("slots_used") or 1))
+            self.fp[i] = (data.get("fp_cost", fp_cost) or 0) + (data.get("fp_cost_extra") or 0)
+            raw[i] = [
+                sum(required.values()),
+                self.fp[i],
+                data.get("sp_cost") or 0,
+                kind == 'sorcery',
+                kind == 'incantation',
+                bool(data.get("is_horseback_castable")),
+            ]
+            required_rows.append(_SpellRequirements(i, required))
+
+        scale = raw[:, :3].max(axis=0) if n else np.ones(3)
+        raw[:, :3] /= np.where(scale > 0, scale, 1.0)
+        self.features = raw
+        self.requirements = RequirementMatrix(required_rows)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def weights(self, stats):
+        """Feature weights for one stat profile: the school bonus is each school's share of int + faith."""
+        intelligence = max(int(stats.get('intelligence', 0)), 0)
+        faith = max(int(stats.get('faith', 0)), 0)
+        total = intelligence + faith or 1
+        return np.asarray([W_POWER, -W_FP, -W_SP, intelligence / total, faith / total, W_HORSEBACK])
+
+    def score(self, stats, kind=None):
+        """(scores, eligible) for every spell in one pass; `kind` keeps only sorceries or incantations."""
+        scores = self.features @ self.weights(stats)
+        eligible = self.requirements.mask(stats)
+        if kind is not None:
+            eligible &= np.asarray(self.kinds) == kind
+        return scores, eligible
+
+
+def select(scores, slots, candidates, budget):
+    """
+    0/1 knapsack over memory slots: rows of `candidates` with the highest total score whose
+    slots_used fit in `budget`, best first. Only the top budget // s spells of each slot size can
+    be in an optimum, so the DP stays tiny.
+    """
+    pool = []
+    for size in np.unique(slots[candidates]):
+        rows = candidates[slots[candidates] == size]
+        pool.extend(rows[np.argsort(-scores[rows], kind='stable')][:budget // size])
+
+    dp = np.zeros(budget + 1)
+    take = np.zeros((len(pool), budget + 1), dtype=bool)
+    for i, row in enumerate(pool):
+        size = slots[row]
+        if size > budget:
+            continue
+        with_it = np.full(budget + 1, -np.inf)
+        with_it[size:] = dp[:budget + 1 - size] + scores[row]
+        take[i] = with_it > dp
+        dp = np.maximum(dp, with_it)
+
+    chosen, left = [], budget
+    for i in reversed(range(len(pool))):
+        if take[i, left]:
+            chosen.append(pool[i])
+            left -= slots[pool[i]]
+    return sorted(chosen, key=lambda r: -scores[r])
+
+
+def _load_records():
+    return list(
+        Item.objects.filter(type__in=SPELL_TYPES).order_by('id').values_list(
+            'id', 'name', 'type', 'erdb_id', 'required_stats', 'fp_cost',
+        )
+    )
+
+
+_spells = None
+_spells_lock = threading.Lock()
+
+
+def get_spell_table():
+    """SpellTable for the current catalog version (rebuilt when the catalog stamp moves)."""
+    global _spells
+    version = get_catalog_version()
+    table = _spells
+    if table is not None and table.version == version:
+        return table
+    with _spells_lock:
+        table = _spells
+        if table is None or table.version != version:
+            with open(SPELLS_DATA, encoding="utf-8") as f:
+                table = SpellTable(version, _load_records(), json.load(f))
+            _spells = table
+    return table
+
+
+def rank_spells(stats, memory_slots=DEFAULT_MEMORY_SLOTS, kind=None, limit=20):
+    """
+    Eligible spells for `stats` ranked by score, plus the best set fitting `memory_slots`.
+    Returns {'ranking': [...], 'selection': [...], 'slots_used': n}; spells are
+    {id, name, kind, fp_cost, slots_used, score}.
+    """
+    table = get_spell_table()
+    if not len(table):
+        return {'ranking': [], 'selection': [], 'slots_used': 0}
+    scores, eligible = table.score(stats, kind)
+    candidates = np.flatnonzero(eligible & (scores > 0))
+    chosen = select(scores, table.slots, candidates, int(memory_slots))
+    ranked = candidates[np.lexsort((table.ids[candidates], -scores[candidates]))][:limit]
+
+    def as_dict(row):
+        return {
+            'id': int(table.ids[row]),
+            'name': table.names[row],
+            'kind': table.kinds[row],
+            'fp_cost': float(table.fp[row]),
+            'slots_used': int(table.slots[row]),
+            'score': round(float(scores[row]), 4),
+        }
+
+    return {
+        'ranking': [as_dict(r) for r in ranked],
+        'selection': [as_dict(r) for r in chosen],
+        'slots_used': int(table.slots[chosen].sum()) if chosen else 0,
+    }
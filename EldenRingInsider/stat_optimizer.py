@@ -0,0 +1,118 @@
+# EldenRingInsider/stat_optimizer.py
+import numpy as np
+
+from .attack_rating import SCALING_STATS, TWO_HAND_STRENGTH, get_weapon_table
+
+SOFT_CAP = 99          # highest value a stat can be levelled to
+MAX_BUDGET = 5 * 98    # spending more than this can't raise any scaling stat further
+CHUNK = 16             # weapons per knapsack pass (bounds the (W, budget, budget) work array)
+
+
+def stat_gains(weapons, rows, level, two_handed=False):
+    """
+    Per-weapon pieces of the AR formula at one upgrade level:
+      base (W,) total base damage, gains (W, K, SOFT_CAP + 1) total scaling bonus from stat K at each
+      levelled value, and required (W, K) the lowest levelled value that meets each requirement.
+    With all requirements met AR = base + sum_k gains[k, stat_k], so stats can be optimised independently.
+    """
+    tables = weapons.tables
+    reinf = weapons.reinf[rows]
+    level_idx = tables.level_index(reinf, [level])[:, 0]
+    base = weapons.base[rows] * tables.reinf_damage[reinf, level_idx]                  # (W, T)
+    scaling_mult = tables.reinf_scaling[reinf, level_idx]                              # (W, K)
+
+    values = np.tile(np.arange(SOFT_CAP + 1), (len(SCALING_STATS), 1))              # (K, S) levelled value
+    required = weapons.requirements[rows].astype(np.intp)
+    if two_handed:
+        # the curve is read at the two-handed value; requirements are met by it too
+        values[0] = np.minimum(np.floor(values[0] * TWO_HAND_STRENGTH), tables.max_stat)
+        required[:, 0] = np.ceil(required[:, 0] / TWO_HAND_STRENGTH)
+    curve = tables.graphs[weapons.graph[rows][:, :, None, None], values[None, None, :, :]]  # (W, T, K, S)
+    gains = np.einsum('wt,wtk,wk,wtks->wks', base, weapons.scaling[rows], scaling_mult, curve)
+    return base.sum(axis=1), gains, required
+
+
+def _best_allocations(gains, start, budget):
+    """
+    Exact max-plus knapsack over the stats, for all weapons at once.
+    best (W, budget + 1): largest total scaling bonus reachable with at most b levels over `start`,
+    choice (K, W, budget + 1): levels given to stat K in that optimum (for backtracking).
+    """
+    n, K, _ = gains.shape
+    budgets = np.arange(budget + 1)
+    # dp[w, b]: best bonus of the stats seen so far with at most b levels spent on them
+    dp = np.zeros((n, budget + 1))
+    choice = np.zeros((K, n, budget + 1), dtype=np.intp)
+    for k in range(K):
+        spend = np.arange(min(budget, SOFT_CAP - start[:, k].min()) + 1)                 # levels given to stat k
+        b_minus_x = budgets[:, None] - spend[None, :]                                    # (b, x)
+        target = start[:, k, None] + spend[None, :]                                      # (W, x)
+        h = np.take_along_axis(gains[:, k], np.minimum(target, SOFT_CAP), axis=1)
+        h = np.where(target <= SOFT_CAP, h, -np.inf)
+        cand = np.where(b_minus_x >= 0, dp[:, np.clip(b_minus_x, 0, None)] + h[:, None, :], -np.inf)  # (W, b, x)
+        choice[k] = np.argmax(cand, axis=2)
+        dp = np.take_along_axis(cand, choice[k][:, :, None], axis=2)[:, :, 0]
+    return dp, choice
+
+
+def optimize_stats(stats, budget, level=25, two_handed=False, weapon_ids=None, item_types=None):
+    """
+    How to spend `budget` levels on top of `stats` to maximise each weapon's AR at `level`.
+
+    Levels first go to meeting the weapon's requirements; the rest is split between the five
+    scaling stats by an exact knapsack. Returns one entry per weapon with the Pareto set of
+    (levels spent, AR): every budget at which the best reachable AR strictly improves.
+    Weapons whose requirements cost more than `budget` are reported with an empty frontier;
+    a requested weapon with an unknown upgrade path raises ValueError.
+    """
+    weapons = get_weapon_table()
+    if weapon_ids is not None:
+        unscored = sorted(i for i in weapon_ids if i in weapons.unscored)
+        if unscored:
+            raise ValueError(f"unknown upgrade path for weapons {unscored}")
+        rows = np.asarray([weapons.row_of[i] for i in weapon_ids if i in weapons.row_of], dtype=np.intp)
+    else:
+        wanted = set(item_types or ())
+        rows = np.asarray([i for i, t in enumerate(weapons.types) if not wanted or t in wanted], dtype=np.intp)
+    if not len(rows):
+        return []
+    budget = int(min(budget, MAX_BUDGET))
+
+    current = np.minimum([int(stats.get(k, 0)) for k in SCALING_STATS], SOFT_CAP)
+    base, gains, required = stat_gains(weapons, rows, level, two_handed)
+    start = np.maximum(current[None, :], np.minimum(required, SOFT_CAP))               # (W, K)
+    entry_cost = (start - current[None, :]).sum(axis=1)
+    feasible = (entry_cost <= budget) & (required <= SOFT_CAP).all(axis=1)
+
+    parts = [_best_allocations(gains[i:i + CHUNK], start[i:i + CHUNK], budget) for i in range(0, len(rows), CHUNK)]
+    best = np.concatenate([p[0] for p in parts])
+    choice = np.concatenate([p[1] for p in parts], axis=1)
+
+    results = []
+    for w, row in enumerate(rows):
+        entry = {
+            'id': int(weapons.ids[row]),
+            'name': weapons.names[row],
+            'type': weapons.types[row],
+            'required_levels': int(entry_cost[w]),
+            'pareto': [],
+        }
+        if feasible[w]:
+            free = budget - entry_cost[w]
+            # AR with at most b free levels is best[w, b]; keep the budgets where it goes up
+            ar = base[w] + np.maximum.accumulate(best[w, :free + 1])
+            steps = np.flatnonzero(np.diff(ar, prepend=-np.inf) > 1e-9)
+            for b in steps:
+                alloc, left = start[w].copy(), b
+                for k in reversed(range(len(SCALING_STATS))):
+                    x = choice[k, w, left]
+                    alloc[k] += x
+                    left -= x
+                entry['pareto'].append({
+                    'levels': int(entry_cost[w] + b),
+                    'attack_rating': int(np.floor(ar[b])),
+                    'stats': dict(zip(SCALING_STATS, alloc.tolist())),
+                })
+        results.append(entry)
+    results.sort(key=lambda e: -(e['pareto'][-1]['attack_rating'] if e['pareto'] else -1))
+    return results
@@ -5,4 +5,16 @@ register = template.Library()
 
 @register.filter
 def get_slot(slots, slot_code):
-    return slots.filter(slot_name=slot_code).first()
+    """
+    Look up the EquipmentSlot for `slot_code`.
+    Accepts a {slot_code: slot} mapping (builds_view's build.slot_map) or an iterable of slots;
+    iterating uses the prefetch cache instead of issuing a query per slot.
+    """
+    if slots is None:
+        return None
+    if isinstance(slots, dict):
+        return slots.get(slot_code)
+    for slot in slots:
+        if slot.slot_name == slot_code:
+            return slot
+    return None
@@ -1,3 +1,549 @@
+import json
+from itertools import product
+
+import numpy as np
 from django.test import TestCase
+from django.urls import reverse
+
+from .armor_optimizer import ARMOR_DATA, ARMOR_SLOTS, FEATURES, canonical_objective, optimize_armor
+from .attack_rating import SCALING_STATS, attack_rating, get_weapon_table, stat_matrix
+from .catalog import bump_catalog_version, get_catalog_version
+from .importer import import_files
+from .management.commands.import_erdb import ERDB_TO_ITEMTYPE
+from .models import Build, EquipmentSlot, Item, ItemType
+from .pagination import encode_cursor
+from .search import search_items
+from .spell_ranking import SPELL_TYPES, SPELLS_DATA, get_spell_table, rank_spells
+from .stat_optimizer import optimize_stats
+from .views import ITEMS_PER_PAGE, MAX_BATCH_PROFILES
+
+
+class BuildsViewQueryCountTests(TestCase):
+    """The builds listing must not issue a query per slot (18 slots x 12 builds)."""
+
+    # COUNT for the paginator, the page of builds, and one prefetch for slots + items
+    EXPECTED_QUERIES = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.items = [
+            Item.objects.create(name=f'Item {i}', type='katana', image_url=f'https://example.com/{i}.png')
+            for i in range(len(EquipmentSlot.SLOT_CHOICES))
+        ]
+
+    def make_builds(self, count):
+        for b in range(count):
+            build = Build.objects.create(name=f'Build {b}', description='')
+            EquipmentSlot.objects.bulk_create([
+                EquipmentSlot(build=build, slot_name=code, item=item)
+                for (code, _), item in zip(EquipmentSlot.SLOT_CHOICES, self.items)
+            ])
+
+    def test_query_count_is_constant_in_page_size(self):
+        self.make_builds(1)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get(reverse('builds'))
+        self.assertContains(response, 'Item 17')
+
+        self.make_builds(20)
+        with self.assertNumQueries(self.EXPECTED_QUERIES):
+            response = self.client.get(reverse('builds'))
+        self.assertEqual(len(response.context['builds']), 12)
+
+    def test_every_slot_is_rendered_from_the_prefetch(self):
+        self.make_builds(1)
+        response = self.client.get(reverse('builds'))
+        build = response.context['builds'][0]
+        self.assertEqual(set(build.slot_map), {code for code, _ in EquipmentSlot.SLOT_CHOICES})
+        for item in self.items:
+            self.assertContains(response, f'/item/{item.id}/')
+
+
+class RecommendBuildBatchTests(TestCase):
+    """recommend_build_batch answers each profile exactly as recommend_build would."""
+
+    PROFILES = [
+        {'strength': 40, 'dexterity': 12},
+        {'dexterity': 45, 'arcane': 30, 'endurance': 35},
+        {'intelligence': 60, 'mind': 30, 'memory_slots': 6},
+        {'faith': 50, 'vigor': 40},
+        {'strength': 8, 'dexterity': 8},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        specs = [
+            ('Greatsword', 'greatsword', {'strength': 31}), ('Uchigatana', 'katana', {'dexterity': 15}),
+            ('Rivers of Blood', 'katana', {'dexterity': 18, 'arcane': 20}), ('Club', 'hammer', {}),
+            ('Glintstone Staff', 'glintstone_staff', {'intelligence': 10}), ('Finger Seal', 'sacred_seal', {'faith': 10}),
+            ('Iron Helmet', 'head', {'strength': 0}), ('Scale Armor', 'body', {}), ('Iron Gauntlets', 'arms', {}),
+            ('Leather Trousers', 'legs', {}), ('Radagon Icon', 'talisman', {}), ('Erdtree Favor', 'talisman', {}),
+            ('Bloody Slash', 'ash_of_war', {}), ('Glintstone Pebble', 'sorcery', {'intelligence': 10}),
+            ('Comet Azur', 'sorcery', {'intelligence': 60}), ('Heal', 'incantation', {'faith': 12}),
+        ]
+        for name, item_type, required in specs:
+            Item.objects.create(name=name, type=item_type, required_stats=required, weight=5.0,
+                                image_url=f'https://example.com/{item_type}.png')
+
+    def setUp(self):
+        bump_catalog_version()
+
+    def post(self, name, body):
+        return self.client.post(reverse(name), body, content_type='application/json')
+
+    def test_batch_equals_single_requests(self):
+        single = [self.post('recommend_build', p).json() for p in self.PROFILES]
+        batch = self.post('recommend_build_batch', {'profiles': self.PROFILES})
+        self.assertEqual(batch.status_code, 200)
+        self.assertEqual(batch.json()['results'], single)
+        # the bare-list form too
+        self.assertEqual(self.post('recommend_build_batch', self.PROFILES).json()['results'], single)
+
+    def test_too_many_profiles_are_rejected(self):
+        response = self.post('recommend_build_batch', [{}] * (MAX_BATCH_PROFILES + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.post('recommend_build_batch', [{}] * MAX_BATCH_PROFILES).status_code, 200)
+
+    def test_malformed_batches_are_rejected(self):
+        for body in ({'profiles': {'strength': 10}}, [{'strength': 10}, 'nope']):
+            with self.subTest(body=body):
+                self.assertEqual(self.post('recommend_build_batch', body).status_code, 400)
+
+
+class ItemListKeysetTests(TestCase):
+    """Keyset pages of the item list, joined together, are the OFFSET pages in the same order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # many exact ties on the lower-cased sort name, across types, so the id tie-break matters
+        names = ['Alpha Blade', 'alpha blade', 'ALPHA BLADE', 'Beta', 'beta']
+        types = ['torch', 'katana', 'dagger']
+        Item.objects.bulk_create([
+            Item(name=names[i % len(names)], type=types[i % len(types)], description='blade')
+            for i in range(2 * ITEMS_PER_PAGE + 17)
+        ])
+
+    def ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [item.id for item in response.context['page_obj'].object_list]
+
+    def offset_order(self, params):
+        ids, page = [], 1
+        while True:
+            response = self.client.get(reverse('item_list'), {**params, 'page': page})
+            ids += self.ids(response)
+            if not response.context['page_obj'].has_next():
+                return ids
+            page += 1
+
+    def keyset_order(self, params):
+        ids, cursor = [], ''
+        while True:
+            response = self.client.get(reverse('item_list'), {**params, 'cursor': cursor})
+            ids += self.ids(response)
+            cursor = response.context['page_obj'].next_cursor
+            if cursor is None:
+                return ids
+
+    def test_keyset_matches_offset(self):
+        for params in ({}, {'type': 'katana,torch'}, {'q': 'blade'}):
+            with self.subTest(params=params):
+                expected = self.offset_order(params)
+                self.assertGreater(len(expected), ITEMS_PER_PAGE)
+                self.assertEqual(self.keyset_order(params), expected)
+
+    def test_bad_cursor_is_rejected(self):
+        for cursor in ('not a cursor', encode_cursor([1, 'alpha'])):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('item_list'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+
+
+class ItemSearchTests(TestCase):
+    """Full-text item search ranks name hits above description hits and follows Item writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.by_name = Item.objects.create(name='Moonveil', type='katana', description='A katana.')
+        cls.by_text = Item.objects.create(name='Carian Knight Sword', type='straightsword',
+                                          description='Glows faintly like the moonveil.')
+        Item.objects.create(name='Uchigatana', type='katana', description='Bleeds.')
+
+    def search(self, query):
+        return list(search_items(Item.objects.all(), query).order_by('-rank', 'id').values_list('id', 'rank'))
+
+    def test_results_are_ranked(self):
+        hits = self.search('moonveil')
+        self.assertEqual([i for i, _ in hits], [self.by_name.id, self.by_text.id])
+        self.assertGreater(hits[0][1], hits[1][1])
+
+    def test_prefix_and_no_match(self):
+        self.assertEqual([i for i, _ in self.search('moonv')], [self.by_name.id, self.by_text.id])
+        self.assertEqual(self.search('rivers of blood'), [])
+
+    def test_index_follows_save_and_delete(self):
+        item = Item.objects.create(name='Zweihander', type='colossal_sword')
+        self.assertEqual([i for i, _ in self.search('zweihander')], [item.id])
+        item.name = 'Greatsword'
+        item.save()
+        self.assertEqual(self.search('zweihander'), [])
+        self.assertEqual([i for i, _ in self.search('greatsword')], [item.id])
+        item.delete()
+        self.assertEqual(self.search('greatsword'), [])
+
+
+class BulkImporterTests(TestCase):
+    """import_files writes only the difference, and reports what it did."""
+
+    RECORDS = [
+        {'id': 1, 'name': 'Uchigatana', 'category': 'Katana', 'weight': 5.5},
+        {'id': 2, 'name': 'Moonveil', 'category': 'Katana', 'weight': 6.5},
+        {'id': 3, 'name': 'Iron Helmet', 'category': 'Head', 'weight': 3.8},
+    ]
+
+    def run_import(self, records):
+        [report] = import_files([('records.json', records)], lambda c: ERDB_TO_ITEMTYPE.get(c, ItemType.OTHER))
+        return report.total, report.created, report.updated, report.unchanged
+
+    def test_counts_and_idempotent_rerun(self):
+        self.assertEqual(self.run_import(self.RECORDS), (3, 3, 0, 0))
+        self.assertEqual(Item.objects.count(), 3)
+
+        version = get_catalog_version()
+        self.assertEqual(self.run_import(self.RECORDS), (3, 0, 0, 3))
+        self.assertEqual(Item.objects.count(), 3)
+        self.assertEqual(get_catalog_version(), version)
+
+    def test_only_changed_rows_are_updated(self):
+        self.run_import(self.RECORDS)
+        helmet = Item.objects.get(erdb_id='3')
+        helmet.location = 'Stormveil'   # not an UPDATE_FIELDS column: survives the re-import
+        helmet.save()
+        changed = [dict(self.RECORDS[0], category='Greatsword')] + self.RECORDS[1:]
+        self.assertEqual(self.run_import(changed), (3, 0, 1, 2))
+        self.assertEqual(Item.objects.get(erdb_id='1').type, ItemType.GREATSWORD)
+        self.assertEqual(Item.objects.get(erdb_id='3').location, 'Stormveil')
+
+    def test_repeated_id_in_one_run(self):
+        repeated = self.RECORDS + [dict(self.RECORDS[0], category='Greatsword')]
+        self.assertEqual(self.run_import(repeated), (4, 3, 0, 1))
+        self.assertEqual(Item.objects.get(erdb_id='1').type, ItemType.GREATSWORD)
+
+
+class GetItemsConditionalGetTests(TestCase):
+    """get_items answers revalidations from the catalog version alone, and a bump changes the ETag."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.helm = Item.objects.create(name='Iron Helmet', type='head', image_url='https://example.com/h.png')
+
+    def setUp(self):
+        bump_catalog_version()
+
+    def get(self, **headers):
+        return self.client.get(reverse('get_items'), {'type': 'head'}, **headers)
+
+    def test_matching_etag_is_not_modified(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([i['id'] for i in first.json()], [self.helm.id])
+        again = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_version_bump_changes_the_etag(self):
+        first = self.get()
+        added = Item.objects.create(name='Kaiden Helm', type='head', image_url='https://example.com/k.png')
+        bump_catalog_version()
+        second = self.get(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual([i['id'] for i in second.json()], [self.helm.id, added.id])
+
+    def test_types_get_their_own_etag(self):
+        self.assertNotEqual(self.get()['ETag'], self.client.get(reverse('get_items'), {'type': 'body'})['ETag'])
+
+
+# ------------------------------
+# Optimizer tests: each optimizer is checked against an exhaustive search on a small fixture
+# ------------------------------
+def exhaustive_best(choices, value, feasible=lambda combo: True):
+    """Largest value(combo) over every combination taking one entry from each of `choices`; None if none is feasible."""
+    best = None
+    for combo in product(*choices):
+        if feasible(combo):
+            v = value(combo)
+            if best is None or v > best:
+                best = v
+    return best
+
+
+class CatalogTablesTestCase(TestCase):
+    """The optimizer tables are cached per catalog version: every test starts from a fresh stamp."""
+
+    def setUp(self):
+        bump_catalog_version()
+
+
+def _weapon(name, reinforcement_id=0, **required):
+    attack_power = {
+        'base_damage': {'physical': 110, 'magic': 70},
+        'scaling': {'strength': 0.45, 'dexterity': 0.3, 'intelligence': 0.6},
+        'correction_attack_id': 10000,
+        'correction_calc_id': {'physical': 0, 'magic': 4},
+    }
+    if reinforcement_id is not None:
+        attack_power['reinforcement_id'] = reinforcement_id
+    return Item.objects.create(name=name, type='straight_sword', attack_power=attack_power, required_stats=required)
+
+
+class StatOptimizerTests(CatalogTablesTestCase):
+    """optimize_stats must match an exhaustive search over every way to spend the budget."""
+
+    START = {'strength': 10, 'dexterity': 10, 'intelligence': 10, 'faith': 10, 'arcane': 10}
+    BUDGET = 7
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.regular = _weapon('Regular Sword', strength=12, intelligence=13)
+        cls.somber = _weapon('Somber Sword', reinforcement_id=2200, strength=11)
+        cls.unknown = _weapon('Unknown Path Sword', reinforcement_id=None)
+
+    def ar(self, weapon, stats, level):
+        weapons = get_weapon_table()
+        return attack_rating(weapons, [level], stat_matrix([stats]), [weapons.row_of[weapon.id]])[0, 0, 0].sum()
+
+    def brute_force(self, weapon, budget, level):
+        """Best total AR over every allocation of at most `budget` levels that meets the requirements."""
+        required = weapon.required_stats
+
+        def allocate(spend):
+            return {k: self.START[k] + x for k, x in zip(SCALING_STATS, spend)}
+
+        return exhaustive_best(
+            [range(budget + 1)] * len(SCALING_STATS),
+            lambda spend: self.ar(weapon, allocate(spend), level),
+            lambda spend: sum(spend) <= budget and all(allocate(spend)[k] >= v for k, v in required.items()),
+        )
+
+    def test_matches_brute_force(self):
+        for weapon, level in ((self.regular, 25), (self.regular, 7), (self.somber, 25)):
+            with self.subTest(weapon=weapon.name, level=level):
+                [result] = optimize_stats(self.START, self.BUDGET, level, weapon_ids=[weapon.id])
+                self.assertTrue(result['pareto'])
+                for point in result['pareto']:
+                    # each point is reachable with its levels, and nothing reachable with them does better
+                    spent = sum(point['stats'][k] - self.START[k] for k in SCALING_STATS)
+                    self.assertEqual(spent, point['levels'])
+                    self.assertEqual(point['attack_rating'], int(np.floor(self.ar(weapon, point['stats'], level))))
+                    best = self.brute_force(weapon, point['levels'], level)
+                    self.assertEqual(point['attack_rating'], int(np.floor(best)))
+                best = self.brute_force(weapon, self.BUDGET, level)
+                self.assertEqual(result['pareto'][-1]['attack_rating'], int(np.floor(best)))
+
+    def test_requirements_are_paid_first(self):
+        [result] = optimize_stats(self.START, self.BUDGET, weapon_ids=[self.regular.id])
+        self.assertEqual(result['required_levels'], 5)
+        first = result['pareto'][0]['stats']
+        self.assertGreaterEqual(first['strength'], 12)
+        self.assertGreaterEqual(first['intelligence'], 13)
+
+    def test_budget_below_requirements(self):
+        # infeasible: nothing meets the requirements, so the frontier is empty
+        for budget in (0, 4):
+            with self.subTest(budget=budget):
+                self.assertIsNone(self.brute_force(self.regular, budget, 25))
+                [short] = optimize_stats(self.START, budget, weapon_ids=[self.regular.id])
+                self.assertEqual(short['pareto'], [])
+                self.assertEqual(short['required_levels'], 5)
+
+    def test_zero_budget(self):
+        stats = {**self.START, 'strength': 12, 'intelligence': 13}
+        [met] = optimize_stats(stats, 0, weapon_ids=[self.regular.id])
+        self.assertEqual(len(met['pareto']), 1)
+        self.assertEqual(met['pareto'][0]['levels'], 0)
+        self.assertEqual(met['pareto'][0]['stats'], {k: stats[k] for k in SCALING_STATS})
+
+    def test_empty_inputs(self):
+        self.assertEqual(optimize_stats(self.START, self.BUDGET, weapon_ids=[]), [])
+        self.assertEqual(optimize_stats(self.START, self.BUDGET, item_types=['no_such_type']), [])
+
+    def test_identical_weapons_tie(self):
+        twin = _weapon('Regular Sword', strength=12, intelligence=13)
+        bump_catalog_version()
+        first, second = optimize_stats(self.START, self.BUDGET, weapon_ids=[self.regular.id, twin.id])
+        self.assertEqual(first['pareto'], second['pareto'])
+
+    def test_somber_path_is_not_the_regular_one(self):
+        # +25 on the regular scale is +10 on the somber path: same base damage, stronger scaling
+        twin = _weapon('Regular Twin', strength=11)
+        bump_catalog_version()
+        stats = {**self.START, 'strength': 20}
+        self.assertGreater(self.ar(self.somber, stats, 25), self.ar(twin, stats, 25))
+        self.assertGreater(self.ar(self.somber, stats, 12), self.ar(twin, stats, 12))
+
+    def test_unknown_upgrade_path_is_rejected(self):
+        self.assertIn(self.unknown.id, get_weapon_table().unscored)
+        with self.assertRaises(ValueError):
+            optimize_stats(self.START, 5, weapon_ids=[self.unknown.id])
+
+
+class ArmorOptimizerTests(CatalogTablesTestCase):
+    """optimize_armor must find the same best score as trying every head/body/arms/legs combination."""
+
+    PER_SLOT = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        with open(ARMOR_DATA, encoding='utf-8') as f:
+            cls.armor = json.load(f)
+        cls.pieces = {slot: [] for slot in ARMOR_SLOTS}
+        for data in cls.armor.values():
+            slot = data['category'].lower()
+            if len(cls.pieces[slot]) < cls.PER_SLOT:
+                cls.pieces[slot].append(cls.make_piece(slot, data))
+
+    @classmethod
+    def make_piece(cls, slot, data, erdb_id=True):
+        values = {**data['absorptions'], **data['resistances']}
+        item = Item.objects.create(name=data['name'], type=slot, weight=data['weight'],
+                                   erdb_id=str(data['id']) if erdb_id else None)
+        return item.id, data['weight'], [values.get(f) or 0 for f in FEATURES]
+
+    def brute_force(self, objective, max_weight):
+        weights = np.asarray(canonical_objective(objective))
+        # None is the empty slot
+        return exhaustive_best(
+            [[None] + self.pieces[slot] for slot in ARMOR_SLOTS],
+            lambda combo: sum(np.dot(p[2], weights) for p in combo if p is not None),
+            lambda combo: max_weight is None or sum(p[1] for p in combo if p is not None) <= max_weight + 1e-9,
+        )
+
+    def test_matches_brute_force(self):
+        lightest = sum(min(p[1] for p in self.pieces[slot]) for slot in ARMOR_SLOTS)
+        for objective in (None, {'poise': 1.0}, {'physical': 2.0, 'fire': 1.0, 'focus': 0.1}):
+            for cap in (None, 40.0, lightest + 3, lightest, 6.0, 0.0):
+                with self.subTest(objective=objective, cap=cap):
+                    result = optimize_armor(objective, cap)
+                    self.assertAlmostEqual(result['score'], self.brute_force(objective, cap), places=1)
+                    if cap is not None:
+                        self.assertLessEqual(result['weight'], cap + 0.01)
+
+    def test_cap_below_the_lightest_piece_leaves_slots_empty(self):
+        below = min(p[1] for slot in ARMOR_SLOTS for p in self.pieces[slot]) - 0.5
+        result = optimize_armor(None, below)
+        self.assertEqual([result[slot] for slot in ARMOR_SLOTS], [None] * 4)
+        self.assertEqual((result['weight'], result['score']), (0.0, 0.0))
+
+    def test_infeasible_cap_raises(self):
+        self.assertIsNone(self.brute_force(None, -1))
+        with self.assertRaises(ValueError):
+            optimize_armor(None, -1)
+
+    def test_invalid_input_raises(self):
+        for objective, cap in ((['poise'], None), ({'agility': 1.0}, None), ({'poise': 'x'}, None), (None, float('nan'))):
+            with self.subTest(objective=objective, cap=cap), self.assertRaises(ValueError):
+                optimize_armor(objective, cap)
+
+    def test_recommend_rejects_invalid_armor_input(self):
+        for body in ({'armor_objective': ['poise']}, {'max_armor_weight': -5}):
+            with self.subTest(body=body):
+                response = self.client.post(reverse('recommend_build'), body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+
+    def test_empty_catalog(self):
+        Item.objects.filter(type__in=ARMOR_SLOTS).delete()
+        bump_catalog_version()
+        result = optimize_armor({'poise': 1.0}, 30)
+        self.assertEqual([result[slot] for slot in ARMOR_SLOTS], [None] * 4)
+        self.assertEqual(result['score'], 0.0)
+
+    def test_identical_pieces_tie_on_the_lower_id(self):
+        best_id, _, features = max(self.pieces['head'], key=lambda p: p[2][FEATURES.index('poise')])
+        data = next(d for d in self.armor.values() if str(d['id']) == Item.objects.get(pk=best_id).erdb_id)
+        self.make_piece('head', data, erdb_id=False)   # same name, so the same armor.json row
+        bump_catalog_version()
+        result = optimize_armor({'poise': 1.0})
+        self.assertEqual(result['head'], best_id)
+
+
+class SpellRankingTests(CatalogTablesTestCase):
+    """The memory-slot selection of rank_spells must be an optimal knapsack."""
+
+    STATS = {'intelligence': 80, 'faith': 80, 'arcane': 30, 'strength': 30, 'dexterity': 30}
+
+    @classmethod
+    def setUpTestData(cls):
+        with open(SPELLS_DATA, encoding='utf-8') as f:
+            spells = list(json.load(f).values())
+        # a few spells of each slot size, both schools
+        cls.spells = []
+        for size, count in ((1, 6), (2, 3), (3, 3)):
+            cls.spells += [s for s in spells if s['slots_used'] == size][:count]
+        for data in cls.spells:
+            cls.make_spell(data)
+
+    @classmethod
+    def make_spell(cls, data, erdb_id=True):
+        return Item.objects.create(
+            name=data['name'], type=data['category'].lower(), erdb_id=str(data['id']) if erdb_id else None,
+            required_stats=data['requirements'], fp_cost=data['fp_cost'],
+        )
+
+    def brute_force(self, memory_slots, kind=None):
+        table = get_spell_table()
+        scores, eligible = table.score(self.STATS, kind)
+        rows = [r for r in np.flatnonzero(eligible) if scores[r] > 0]
+        # None leaves the spell out
+        return exhaustive_best(
+            [(None, r) for r in rows],
+            lambda combo: sum(scores[r] for r in combo if r is not None),
+            lambda combo: sum(table.slots[r] for r in combo if r is not None) <= memory_slots,
+        )
+
+    def selected_score(self, selection):
+        table = get_spell_table()
+        scores, _ = table.score(self.STATS)
+        rows = [int(np.flatnonzero(table.ids == s['id'])[0]) for s in selection]
+        return scores[rows].sum()
+
+    def test_selection_matches_brute_force(self):
+        for memory_slots in (1, 2, 3, 4, 5, 7):
+            for kind in (None, 'sorcery', 'incantation'):
+                with self.subTest(memory_slots=memory_slots, kind=kind):
+                    result = rank_spells(self.STATS, memory_slots, kind=kind)
+                    if kind is None:
+                        self.assertTrue(result['selection'])
+                    self.assertLessEqual(result['slots_used'], memory_slots)
+                    self.assertEqual(result['slots_used'], sum(s['slots_used'] for s in result['selection']))
+                    self.assertTrue(all(kind in (None, s['kind']) for s in result['selection']))
+                    self.assertAlmostEqual(self.selected_score(result['selection']), self.brute_force(memory_slots, kind))
+
+    def test_zero_memory_slots(self):
+        self.assertEqual(self.brute_force(0), 0)
+        result = rank_spells(self.STATS, 0)
+        self.assertEqual(result['selection'], [])
+        self.assertEqual(result['slots_used'], 0)
+        self.assertTrue(result['ranking'])
+
+    def test_ineligible_spells_are_never_selected(self):
+        low = {'intelligence': 10, 'faith': 10}
+        result = rank_spells(low, 7)
+        required = dict(Item.objects.values_list('id', 'required_stats'))
+        for spell in result['ranking'] + result['selection']:
+            self.assertTrue(all(low.get(k, 0) >= v for k, v in required[spell['id']].items()))
+
+    def test_empty_catalog(self):
+        Item.objects.filter(type__in=SPELL_TYPES).delete()
+        bump_catalog_version()
+        self.assertEqual(rank_spells(self.STATS, 4), {'ranking': [], 'selection': [], 'slots_used': 0})
 
-# Create your tests here.
+    def test_identical_spells_tie_on_the_lower_id(self):
+        top = rank_spells(self.STATS, 1)['selection'][0]
+        original = Item.objects.get(pk=top['id'])
+        twin = self.make_spell(next(s for s in self.spells if str(s['id']) == original.erdb_id), erdb_id=False)
+        bump_catalog_version()
+        result = rank_spells(self.STATS, 1)
+        self.assertEqual([s['id'] for s in result['selection']], [original.id])
+        tied = [s['id'] for s in result['ranking'] if s['score'] == top['score']]
+        self.assertEqual(tied, [original.id, twin.id])
+        self.assertAlmostEqual(self.selected_score(result['selection']), self.brute_force(1))
@@ -1,15 +1,28 @@
 # myproject/EldenRingInsider/views.py
+import hashlib
 import json
-import random
+import zlib
 from collections import OrderedDict, defaultdict
 
+import numpy as np
 from django.core.paginator import Paginator
-from django.db.models import Q
-from django.http import JsonResponse
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Prefetch, Value, When
+from django.db.models.functions import Collate, Lower
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render, get_object_or_404
-from django.views.decorators.http import require_GET, require_POST
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET, require_POST
 
+from .armor_optimizer import optimize_armor
+from .attack_rating import MAX_LEVEL, get_weapon_table, rank_weapons
+from .catalog import ITEM_TYPE_ORDER, get_catalog, get_catalog_last_modified, get_catalog_version
+from .eligibility import eligible
 from .models import Item, Build, EquipmentSlot
+from .pagination import keyset_page
+from .search import search_items
+from .spell_ranking import DEFAULT_MEMORY_SLOTS, MAX_MEMORY_SLOTS, SPELL_KINDS, SPELL_TYPES, rank_spells
+from .stat_optimizer import optimize_stats
 
 # ------------------------------
 # Small configuration / helpers
@@ -60,14 +73,12 @@ PREFERRED_WEAPON_TYPES = {
     'arcane': ['katana', 'twinblade', 'dagger', 'twinblade'],
 }
 
-# Spell type preferences by main stat
-PREFERRED_SPELL_TYPES = {
-    'intelligence': ['spell'],   # we store in DB as type 'spell'
-    'faith': ['incantation'],
-}
-
 # small utility: safe lowercase name/desc
 def _text_of(item):
+    # catalog records carry the pre-lowered text already
+    text = getattr(item, 'text', None)
+    if text is not None:
+        return text
     name = getattr(item, 'name', '') or ''
     desc = getattr(item, 'description', '') or ''
     return f"{name} {desc}".lower()
@@ -77,6 +88,7 @@ def meets_required_stats(item, stats):
     If item.required_stats exists and is a mapping, ensure the user's stats meet them.
     Accepts keys with flexible capitalization: 'Strength' or 'strength'
     If no required_stats present, returns True.
+    Single-item check; recommendation code uses the catalog's RequirementMatrix instead.
     """
     req = getattr(item, 'required_stats', None)
     if not req:
@@ -120,41 +132,65 @@ def talisman_has_effect(talisman, effect_names):
 # ------------------------------
 # UI: Items / Builds / Pages
 # ------------------------------
-def item_list(request):
-    query = request.GET.get('q', '')
-    item_type = request.GET.get('type', '')
-    item_type_order = [
-        'katana', 'great_katana', 'colossal_sword', 'colossal_weapon', 'curved_sword', 'straightsword', 'greatsword',
-        'dagger', 'twinblade', 'axe', 'great_axe', 'hammer', 'great_hammer', 'flail', 'spear',
-        'short_spear', 'great_spear', 'halberd', 'heavy_thrusting_sword', 'thrusting_sword', 'claw', 'fists',
-        'backhand_blade', 'reaper', 'whip',
-        'small_shield', 'medium_shield', 'greatshield',
-        'staff', 'glintstone_staff', 'sacred_seal',
-        'ballista', 'crossbow', 'bow', 'light_bow', 'greatbow',
-        'torch',
-        'armor', 'spell', 'incantation', 'sorcery', 'talisman', 'ash_of_war', 'consumable', 'other',
-    ]
-    type_index = {t: i for i, t in enumerate(item_type_order)}
+ITEMS_PER_PAGE = 50
 
-    items_qs = Item.objects.all()
+# item list sort key: (type rank, lower-cased name, id); searches put relevance first
+ITEM_LIST_KEYS = ('type_rank', 'sort_name', 'id')
+SEARCH_LIST_KEYS = ('-rank',) + ITEM_LIST_KEYS
 
-    if query:
-        items_qs = Item.objects.filter(
-            Q(name__iexact=query) |
-            Q(name__istartswith=query) |
-            Q(description__icontains=query)
-        )
+
+def _type_rank():
+    # CASE type WHEN 'katana' THEN 0 ... ELSE <last> END
+    return Case(
+        *[When(type=t, then=Value(i)) for i, t in enumerate(ITEM_TYPE_ORDER)],
+        default=Value(len(ITEM_TYPE_ORDER)),
+        output_field=IntegerField(),
+    )
+
+
+def _sort_name():
+    name = Lower('name')
+    # byte-wise ordering so Postgres sorts names the same way Python / SQLite do
+    if connection.vendor == 'postgresql':
+        name = Collate(name, 'C')
+    return name
+
+
+def item_list_queryset(query='', item_type=''):
+    """
+    Filtered Item queryset, ordered in the database by type rank then name.
+    With a search query, results are ranked by relevance first (see search.search_items).
+    Returns (queryset, sort keys).
+    """
+    items_qs = Item.objects.only('id', 'name', 'type', 'image_url')
     if item_type:
-        item_types_list = item_type.split(',')
-        items_qs = items_qs.filter(type__in=item_types_list)
+        items_qs = items_qs.filter(type__in=item_type.split(','))
+    keys = ITEM_LIST_KEYS
+    if query:
+        items_qs = search_items(items_qs, query)
+        keys = SEARCH_LIST_KEYS
+    items_qs = items_qs.annotate(type_rank=_type_rank(), sort_name=_sort_name()).order_by(*keys)
+    return items_qs, keys
 
 
-    items_list = list(items_qs)
-    items_list.sort(key=lambda x: (type_index.get(x.type, len(item_type_order)), (x.name or "").lower()))
+def item_list(request):
+    query = request.GET.get('q', '')
+    item_type = request.GET.get('type', '')
+    item_type_order = ITEM_TYPE_ORDER
 
-    paginator = Paginator(items_list, 50)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    items_qs, sort_keys = item_list_queryset(query, item_type)
+
+    # opt-in keyset pagination: ?cursor= (empty for the first page); no COUNT / OFFSET
+    keyset = 'cursor' in request.GET
+    if keyset:
+        try:
+            page_obj = keyset_page(items_qs, sort_keys, request.GET.get('cursor'), ITEMS_PER_PAGE)
+        except ValueError:
+            return HttpResponseBadRequest('Invalid cursor')
+    else:
+        paginator = Paginator(items_qs, ITEMS_PER_PAGE)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
 
     temp_grouped = defaultdict(list)
     for item in page_obj.object_list:
@@ -178,6 +214,7 @@ def item_list(request):
         'grouped_items': grouped_items,
         'query': query,
         'page_obj': page_obj,
+        'keyset': keyset,
         'query_string': query_string
     })
 
@@ -230,7 +267,10 @@ def item_detail(request, item_id):
 
 def builds_view(request):
     query = request.GET.get('q', '')
-    builds = Build.objects.prefetch_related('equipment_slots__item').all()
+    # one query for the page's slots with their items joined in
+    builds = Build.objects.prefetch_related(
+        Prefetch('equipment_slots', queryset=EquipmentSlot.objects.select_related('item'))
+    ).order_by('id')
     if query:
         builds = builds.filter(name__icontains=query)
 
@@ -250,6 +290,10 @@ def builds_view(request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
+    # slot code -> EquipmentSlot per build, so the template never goes back to the database
+    for build in page_obj:
+        build.slot_map = {slot.slot_name: slot for slot in build.equipment_slots.all()}
+
     return render(request, 'builds.html', {'builds': page_obj, 'page_obj': page_obj, 'slot_order': slot_order})
 
 
@@ -258,7 +302,7 @@ def build_page(request):
     weapons = Item.objects.filter(type__in=ALL_WEAPON_TYPES)
     armors = Item.objects.filter(type='armor')
     talismans = Item.objects.filter(type='talisman')
-    spells = Item.objects.filter(type='spell')
+    spells = Item.objects.filter(type__in=SPELL_TYPES)
     ash_of_wars = Item.objects.filter(type='ash_of_war')
 
     session_build = request.session.get('custom_build', {})
@@ -281,32 +325,52 @@ def build_page(request):
 
 
 # ------------------------------
-# Stat-only recommendation endpoint
+# Stat-only recommendation engine
 # ------------------------------
+STAT_KEYS = ['vigor', 'mind', 'endurance', 'strength', 'dexterity', 'intelligence', 'faith', 'arcane']
+
+# prefer exact weapon names if the stat implies (e.g., Rivers of Blood for bleed/dex)
+WEAPON_NAME_TOKENS = {
+    'dexterity': ['katana', 'uchigatana', 'nagakiba', 'rivers of blood'],
+    'strength': ['greatsword', 'claymore', 'giant', 'crusher'],
+    'intelligence': ['staff', 'moonveil', 'dark moon', 'sorcery'],
+    'faith': ['seal', 'incantation', 'golden vow'],
+    'arcane': ['bleed', 'lord of blood', 'eleonora', 'occult'],
+}
 
-@require_POST
-def recommend_build(request):
+# talisman effects worth chasing per main stat: (effect names, score)
+TALISMAN_EFFECT_PREFERENCES = {
+    'intelligence': (['spell_boost', 'magic_spell_boost', 'intelligence_boost', 'spell_duration_boost'], 4),
+    'faith': (['incantation_boost', 'faith_boost', 'fp_boost'], 4),
+    'strength': (['strength_boost', 'equip_load_boost'], 3),
+    'dexterity': (['dexterity_boost', 'casting_speed_boost'], 3),
+    'arcane': (['arcane_boost', 'status_effect_boost'], 3),
+}
+
+# ash of war name hints per main stat
+ASH_NAME_TOKENS = {
+    'strength': ['lion', 'giant', 'cragblade', 'crusher', 'hammer'],
+    'dexterity': ['unsheathe', 'double', 'quickstep', 'double slash', 'piercing'],
+    'intelligence': ['magic', 'carian', 'glintstone', 'sorcery'],
+    'faith': ['golden', 'blessing', 'sacred', 'faith'],
+    'arcane': ['seppuku', 'blood', 'bloodflame', 'bleed'],
+}
+
+
+def normalise_stats(body):
     """
-    Expects JSON body with stat keys:
-      { vigor, mind, endurance, strength, dexterity, intelligence, faith, arcane }
-    Returns JSON with keys:
-      weapons (list of dicts), head, body, arms, legs (each list of 1 dict or empty),
-      spells (list), talismans (list length 4), ash_of_wars (list length 2)
-    Each dict: { id, name, image_url }
+    Lower-case stat names, turn digit strings into ints and fill in the defaults (10).
+    Raises ValueError if the body isn't a stat mapping.
     """
-    try:
-        body = json.loads(request.body.decode('utf-8') if isinstance(request.body, (bytes, bytearray)) else request.body)
-    except Exception:
-        return JsonResponse({'error': 'Invalid JSON'}, status=400)
-
-    # normalize stat names to lowercase to be robust
+    if not isinstance(body, dict):
+        raise ValueError('stats must be an object')
     stats = {k.lower(): int(v) if isinstance(v, (int, float, str)) and str(v).isdigit() else v for k, v in body.items()}
-
-    # Ensure required numeric defaults
-    for k in ['vigor', 'mind', 'endurance', 'strength', 'dexterity', 'intelligence', 'faith', 'arcane']:
+    for k in STAT_KEYS:
         stats.setdefault(k, 10)
+    return stats
+
 
-    # choose main stat
+def pick_main_stat(stats):
     stat_candidates = {
         'strength': int(stats.get('strength', 0)),
         'dexterity': int(stats.get('dexterity', 0)),
@@ -314,220 +378,424 @@ def recommend_build(request):
         'faith': int(stats.get('faith', 0)),
         'arcane': int(stats.get('arcane', 0)),
     }
-    main_stat = max(stat_candidates.items(), key=lambda x: x[1])[0]
+    return max(stat_candidates.items(), key=lambda x: x[1])[0]
+
+
+def _item_score(item, main_stat, prefer_types, prefer_name_tokens):
+    score = 0
+    name_desc = _text_of(item)
+    # boost for preferred type
+    if item.type in prefer_types:
+        score += 3
+    # boost when main_stat appears in name/desc or preferred tokens
+    if main_stat in name_desc:
+        score += 2
+    for tok in prefer_name_tokens:
+        if tok in name_desc:
+            score += 1
+    return score
+
+
+def _talisman_score(talisman, main_stat):
+    score = 0
+    effects, bonus = TALISMAN_EFFECT_PREFERENCES.get(main_stat, ([], 0))
+    # use talisman_has_effect when possible
+    if effects and talisman_has_effect(talisman, effects):
+        score += bonus
+    # fallback name hints
+    if main_stat in _text_of(talisman):
+        score += 1
+    return score
+
+
+def _ash_score(ash, main_stat):
+    name_desc = _text_of(ash)
+    return sum(2 for tok in ASH_NAME_TOKENS.get(main_stat, []) if tok in name_desc)
+
+
+def _armor_score(armor, heavy, magic, light):
+    # prefer heavy armor for high endurance, magic for intelligence/mind, poise for str/dex
+    s = 0
+    name_desc = _text_of(armor)
+    if heavy:
+        s += (armor.weight or 0) * 1.5
+    if magic and 'magic' in name_desc:
+        s += 5
+    if light and ('light' in name_desc or 'knife' in name_desc):
+        s += 3
+    return s
+
 
-    # ---------------------
-    # helper: score and pick
-    # ---------------------
-    def pick_items(queryset, stats_local, prefer_types=None, prefer_name_tokens=None, limit=5):
+def item_to_small_dict(item):
+    if not item:
+        return None
+    return {'id': getattr(item, 'id', None), 'name': getattr(item, 'name', None), 'image_url': getattr(item, 'image_url', None)}
+
+
+class RecommendationContext:
+    """
+    Everything a recommendation needs that doesn't depend on one user's exact stats:
+    the catalog snapshot, the candidate pools and their heuristic base scores.
+
+    Base scores only depend on the main stat (or, for armor, on three stat thresholds),
+    so they are computed once per key and reused by every profile scored with this context.
+    """
+
+    def __init__(self, catalog=None, rng=None):
+        self.catalog = catalog or get_catalog()
+        # None: every profile gets its own generator seeded from its stats (see profile_rng)
+        self.rng = rng
+        self._rows = {}
+        self._scores = {}
+
+    def pool(self, item_types):
+        return self.catalog.of_types(item_types)
+
+    def rows(self, pool):
+        found = self._rows.get(id(pool))
+        if found is None:
+            found = (pool, np.fromiter((r.row for r in pool), dtype=np.intp, count=len(pool)))
+            self._rows[id(pool)] = found
+        return found[1]
+
+    def base_scores(self, key, pool, score_fn):
+        found = self._scores.get(key)
+        if found is None:
+            found = np.fromiter((score_fn(item) for item in pool), dtype=float, count=len(pool))
+            self._scores[key] = found
+        return found
+
+    def profile_rng(self, stats):
         """
-        Convert queryset into a scored list of items (simple heuristics), return top `limit` items (as list of model instances)
+        Tie-break generator for one profile. Seeded from the stats so a profile gets the same
+        build whether it is asked for alone or inside a batch, and on every repeat.
         """
-        candidates = []
-        prefer_types = set(prefer_types or [])
-        prefer_name_tokens = [t.lower() for t in (prefer_name_tokens or [])]
-
-        for item in queryset:
-            # skip if user doesn't meet required stats
-            if not meets_required_stats(item, stats_local):
-                continue
-
-            score = 0
-            name_desc = _text_of(item)
-
-            # boost for preferred type
-            if item.type in prefer_types:
-                score += 3
-
-            # boost when main_stat appears in name/desc or preferred tokens
-            if main_stat in name_desc:
-                score += 2
-            for tok in prefer_name_tokens:
-                if tok in name_desc:
-                    score += 1
-
-            # small random tie-break
-            score += random.random() * 0.01
-
-            candidates.append((score, item))
-
-        candidates.sort(key=lambda x: x[0], reverse=True)
-        return [c[1] for c in candidates[:limit]]
-
-    # ---------------------
-    # Weapons
-    # ---------------------
-    # gather a pool of weapon types we want to search across
-    weapon_pool_types = ALL_WEAPON_TYPES
-    all_weapons_qs = Item.objects.filter(type__in=weapon_pool_types)
-
-    preferred_types = PREFERRED_WEAPON_TYPES.get(main_stat, [])
-    # prefer exact weapon names if the stat implies (e.g., Rivers of Blood for bleed/dex)
-    prefer_tokens = []
-    if main_stat == 'dexterity':
-        prefer_tokens = ['katana', 'uchigatana', 'nagakiba', 'rivers of blood']
-    elif main_stat == 'strength':
-        prefer_tokens = ['greatsword', 'claymore', 'giant', 'crusher']
-    elif main_stat == 'intelligence':
-        prefer_tokens = ['staff', 'moonveil', 'dark moon', 'sorcery']
-    elif main_stat == 'faith':
-        prefer_tokens = ['seal', 'incantation', 'golden vow']
-    elif main_stat == 'arcane':
-        prefer_tokens = ['bleed', 'lord of blood', 'eleonora', 'occult']
-
-    chosen_weapons = pick_items(all_weapons_qs, stats, prefer_types=preferred_types, prefer_name_tokens=prefer_tokens, limit=8)
-
-    # ensure we provide 4 weapon slots (RH1, RH2, LH1, LH2) for the front-end
-    # if not enough weapons, duplicate sensible choices
-    weapons_result = []
-    used_names = set()
-    i = 0
-    while len(weapons_result) < 4 and i < len(chosen_weapons):
-        item = chosen_weapons[i]
-        if item.name not in used_names:
-            weapons_result.append(item)
-            used_names.add(item.name)
-        i += 1
-    # fallback: pad with any weapons from DB that meet requirements
-    if len(weapons_result) < 4:
-        for item in all_weapons_qs:
-            if item.name not in used_names and meets_required_stats(item, stats):
-                weapons_result.append(item)
-                used_names.add(item.name)
+        if self.rng is not None:
+            return self.rng
+        return np.random.default_rng(zlib.crc32(repr(sorted(stats.items())).encode()))
+
+    def top(self, pool, scores, can_equip, limit, rng):
+        """Highest scoring equippable items of `pool` (small random tie-break), best first."""
+        keep = np.flatnonzero(can_equip[self.rows(pool)])
+        if not keep.size:
+            return []
+        jittered = scores[keep] + rng.random(keep.size) * 0.01
+        order = np.argsort(-jittered, kind='stable')[:limit]
+        return [pool[keep[i]] for i in order]
+
+    def masks(self, stats_list):
+        return self.catalog.requirements.masks(stats_list)
+
+    def recommend(self, stats, can_equip=None):
+        """Build the recommend_build payload for one (normalised) stat profile."""
+        if can_equip is None:
+            can_equip = self.catalog.requirements.mask(stats)
+        main_stat = pick_main_stat(stats)
+        rng = self.profile_rng(stats)
+
+        # ---------------------
+        # Weapons
+        # ---------------------
+        weapons = self.pool(ALL_WEAPON_TYPES)
+        preferred_types = set(PREFERRED_WEAPON_TYPES.get(main_stat, []))
+        prefer_tokens = WEAPON_NAME_TOKENS.get(main_stat, [])
+        weapon_scores = self.base_scores(
+            ('weapons', main_stat), weapons,
+            lambda i: _item_score(i, main_stat, preferred_types, prefer_tokens),
+        )
+        chosen_weapons = self.top(weapons, weapon_scores, can_equip, 8, rng)
+
+        # ensure we provide 4 weapon slots (RH1, RH2, LH1, LH2) for the front-end
+        weapons_result = []
+        used_names = set()
+        for item in chosen_weapons:
             if len(weapons_result) >= 4:
                 break
-    # final pad with None
-    while len(weapons_result) < 4:
-        weapons_result.append(None)
-
-    # ---------------------
-    # Armor (head/body/arms/legs)
-    # ---------------------
-    all_armors_qs = Item.objects.filter(type__in=['head', 'body', 'arms', 'legs'])
-    # Simple scoring per-piece
-    def pick_best_armor_piece(slot_type):
-        candidates = [a for a in all_armors_qs if a.type == slot_type and meets_required_stats(a, stats)]
-        if not candidates:
-            return None
-        # prefer heavy armor for high endurance, magic for intelligence/mind, poise for str/dex
-        def armor_score(a):
-            s = 0
-            name_desc = _text_of(a)
-            endurance = stats.get('endurance', 10)
-            intelligence = stats.get('intelligence', 10)
-            dex = stats.get('dexterity', 10)
-            if endurance >= 30:
-                s += (getattr(a, 'weight', 0) or 0) * 1.5
-            if intelligence >= 30 and 'magic' in name_desc:
-                s += 5
-            if dex >= 30 and ('light' in name_desc or 'knife' in name_desc):
-                s += 3
-            s += random.random() * 0.01
-            return s
-        return max(candidates, key=armor_score)
-
-    head = pick_best_armor_piece('head')
-    body = pick_best_armor_piece('body')
-    arms = pick_best_armor_piece('arms')
-    legs = pick_best_armor_piece('legs')
-
-    # ---------------------
-    # Spells (4)
-    # ---------------------
-    all_spells_qs = Item.objects.filter(type__in=['spell', 'incantation'])
-    spell_prefer = PREFERRED_SPELL_TYPES.get(main_stat, None)
-    chosen_spells = pick_items(all_spells_qs, stats, prefer_types=spell_prefer or [], prefer_name_tokens=[], limit=8)
-    spells_result = chosen_spells[:4]
-    # pad
-    while len(spells_result) < 4:
-        spells_result.append(None)
-
-    # ---------------------
-    # Talismans (4) - try to use effects when present
-    # ---------------------
-    all_talismans_qs = Item.objects.filter(type='talisman')
-    talisman_candidates = []
-    for t in all_talismans_qs:
-        if not meets_required_stats(t, stats):
-            continue
-        score = 0
-        name_desc = _text_of(t)
-        # use talisman_has_effect when possible
-        if main_stat == 'intelligence' and talisman_has_effect(t, ['spell_boost', 'magic_spell_boost', 'intelligence_boost', 'spell_duration_boost']):
-            score += 4
-        if main_stat == 'faith' and talisman_has_effect(t, ['incantation_boost', 'faith_boost', 'fp_boost']):
-            score += 4
-        if main_stat == 'strength' and talisman_has_effect(t, ['strength_boost', 'equip_load_boost']):
-            score += 3
-        if main_stat == 'dexterity' and talisman_has_effect(t, ['dexterity_boost', 'casting_speed_boost']):
-            score += 3
-        if main_stat == 'arcane' and talisman_has_effect(t, ['arcane_boost', 'status_effect_boost']):
-            score += 3
-
-        # fallback name hints
-        if main_stat in name_desc:
-            score += 1
-        # small tie-breaker
-        score += random.random() * 0.01
-        talisman_candidates.append((score, t))
-    talisman_candidates.sort(key=lambda x: x[0], reverse=True)
-    talismans_result = [t for _, t in talisman_candidates[:4]]
-    # pad
-    while len(talismans_result) < 4:
-        talismans_result.append(None)
-
-    # ---------------------
-    # Ashes of War (2)
-    # ---------------------
-    all_ashes_qs = Item.objects.filter(type='ash_of_war')
-    # choose based on simple token match and requirements
-    ash_tokens = {
-        'strength': ['lion', 'giant', 'cragblade', 'crusher', 'hammer'],
-        'dexterity': ['unsheathe', 'double', 'quickstep', 'double slash', 'piercing'],
-        'intelligence': ['magic', 'carian', 'glintstone', 'sorcery'],
-        'faith': ['golden', 'blessing', 'sacred', 'faith'],
-        'arcane': ['seppuku', 'blood', 'bloodflame', 'bleed'],
-    }
-    prefer_ashes_tokens = ash_tokens.get(main_stat, [])
-    chosen_ashes = []
-    for ash in all_ashes_qs:
-        if not meets_required_stats(ash, stats):
-            continue
-        name_desc = _text_of(ash)
-        score = 0
-        for tok in prefer_ashes_tokens:
-            if tok in name_desc:
-                score += 2
-        score += random.random() * 0.01
-        chosen_ashes.append((score, ash))
-    chosen_ashes.sort(key=lambda x: x[0], reverse=True)
-    ashes_result = [a for _, a in chosen_ashes[:2]]
-    while len(ashes_result) < 2:
-        ashes_result.append(None)
-
-    # ---------------------
-    # Build JSON payload (convert items to small dicts)
-    # ---------------------
-    def item_to_small_dict(item):
-        if not item:
-            return None
-        return {'id': getattr(item, 'id', None), 'name': getattr(item, 'name', None), 'image_url': getattr(item, 'image_url', None)}
-
-    response_payload = {
-        'weapons': [item_to_small_dict(i) for i in weapons_result],  # RH1, RH2, LH1, LH2
-        'head': [item_to_small_dict(head)] if head else [],
-        'body': [item_to_small_dict(body)] if body else [],
-        'arms': [item_to_small_dict(arms)] if arms else [],
-        'legs': [item_to_small_dict(legs)] if legs else [],
-        'spells': [item_to_small_dict(s) for s in spells_result],
-        'talismans': [item_to_small_dict(t) for t in talismans_result],
-        'ash_of_wars': [item_to_small_dict(a) for a in ashes_result],
-        'main_stat': main_stat,
-    }
+            if item.name not in used_names:
+                weapons_result.append(item)
+                used_names.add(item.name)
+        # fallback: pad with any weapons from DB that meet requirements
+        if len(weapons_result) < 4:
+            for item in eligible(weapons, can_equip):
+                if item.name not in used_names:
+                    weapons_result.append(item)
+                    used_names.add(item.name)
+                if len(weapons_result) >= 4:
+                    break
+        # final pad with None
+        while len(weapons_result) < 4:
+            weapons_result.append(None)
+
+        # ---------------------
+        # Armor (head/body/arms/legs)
+        # ---------------------
+        armor = {}
+        if stats.get('max_armor_weight') is not None or stats.get('armor_objective') is not None:
+            # joint optimisation of the four slots under the weight cap (bad input raises ValueError)
+            loadout = optimize_armor(stats.get('armor_objective'), stats.get('max_armor_weight'))
+            for slot_type in ['head', 'body', 'arms', 'legs']:
+                armor[slot_type] = self.catalog.by_id.get(loadout[slot_type])
+        else:
+            armor_flags = (
+                stats.get('endurance', 10) >= 30,
+                stats.get('intelligence', 10) >= 30,
+                stats.get('dexterity', 10) >= 30,
+            )
+            for slot_type in ['head', 'body', 'arms', 'legs']:
+                pieces = self.pool([slot_type])
+                scores = self.base_scores(('armor', slot_type, armor_flags), pieces, lambda a: _armor_score(a, *armor_flags))
+                best = self.top(pieces, scores, can_equip, 1, rng)
+                armor[slot_type] = best[0] if best else None
+
+        # ---------------------
+        # Spells (4)
+        # ---------------------
+        # best set for the memory slots (a 2-slot spell leaves one fewer entry)
+        memory_slots = min(max(int(stats.get('memory_slots', DEFAULT_MEMORY_SLOTS)), 0), MAX_MEMORY_SLOTS)
+        picked = rank_spells(stats, memory_slots, limit=0)['selection']
+        spells_result = [self.catalog.by_id.get(s['id']) for s in picked][:4]
+        while len(spells_result) < 4:
+            spells_result.append(None)
+
+        # ---------------------
+        # Talismans (4) - try to use effects when present
+        # ---------------------
+        talismans = self.pool(['talisman'])
+        talisman_scores = self.base_scores(('talismans', main_stat), talismans, lambda t: _talisman_score(t, main_stat))
+        talismans_result = self.top(talismans, talisman_scores, can_equip, 4, rng)
+        while len(talismans_result) < 4:
+            talismans_result.append(None)
+
+        # ---------------------
+        # Ashes of War (2)
+        # ---------------------
+        ashes = self.pool(['ash_of_war'])
+        ash_scores = self.base_scores(('ashes', main_stat), ashes, lambda a: _ash_score(a, main_stat))
+        ashes_result = self.top(ashes, ash_scores, can_equip, 2, rng)
+        while len(ashes_result) < 2:
+            ashes_result.append(None)
+
+        # ---------------------
+        # Build JSON payload (convert items to small dicts)
+        # ---------------------
+        head, body, arms, legs = armor['head'], armor['body'], armor['arms'], armor['legs']
+        return {
+            'weapons': [item_to_small_dict(i) for i in weapons_result],  # RH1, RH2, LH1, LH2
+            'head': [item_to_small_dict(head)] if head else [],
+            'body': [item_to_small_dict(body)] if body else [],
+            'arms': [item_to_small_dict(arms)] if arms else [],
+            'legs': [item_to_small_dict(legs)] if legs else [],
+            'spells': [item_to_small_dict(s) for s in spells_result],
+            'talismans': [item_to_small_dict(t) for t in talismans_result],
+            'ash_of_wars': [item_to_small_dict(a) for a in ashes_result],
+            'main_stat': main_stat,
+        }
+
+    def recommend_many(self, stats_list):
+        """One payload per profile; eligibility for the whole batch is a single comparison."""
+        masks = self.masks(stats_list)
+        return [self.recommend(stats, can_equip=mask) for stats, mask in zip(stats_list, masks)]
+
+
+def _json_body(request):
+    return json.loads(request.body.decode('utf-8') if isinstance(request.body, (bytes, bytearray)) else request.body)
+
+
+# ------------------------------
+# Stat-only recommendation endpoints
+# ------------------------------
+
+# upper bound on profiles per batch request
+MAX_BATCH_PROFILES = 200
+
+
+@require_POST
+def recommend_build(request):
+    """
+    Expects JSON body with stat keys:
+      { vigor, mind, endurance, strength, dexterity, intelligence, faith, arcane }
+    and optionally max_armor_weight / armor_objective ({feature: weight}, see optimize_armor)
+    to pick the armor jointly instead of slot by slot, and memory_slots (default 4) for the spells.
+    Returns JSON with keys:
+      weapons (list of dicts), head, body, arms, legs (each list of 1 dict or empty),
+      spells (list), talismans (list length 4), ash_of_wars (list length 2)
+    Each dict: { id, name, image_url }
+    """
+    try:
+        body = _json_body(request)
+    except Exception:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    try:
+        stats = normalise_stats(body)
+        response_payload = RecommendationContext().recommend(stats)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid stats'}, status=400)
 
     return JsonResponse(response_payload)
 
 
+@require_POST
+def recommend_build_batch(request):
+    """
+    Batch version of recommend_build.
+    Expects either a JSON list of stat dicts or { "profiles": [ {...}, ... ] }.
+    Returns { "results": [ <recommend_build payload>, ... ] } in the same order.
+    Catalog, eligibility and scoring are shared across the batch.
+    """
+    try:
+        body = _json_body(request)
+    except Exception:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    profiles = body.get('profiles') if isinstance(body, dict) else body
+    if not isinstance(profiles, list):
+        return JsonResponse({'error': 'Expected a list of stat profiles'}, status=400)
+    if len(profiles) > MAX_BATCH_PROFILES:
+        return JsonResponse({'error': f'At most {MAX_BATCH_PROFILES} profiles per request'}, status=400)
+
+    try:
+        stats_list = [normalise_stats(p) for p in profiles]
+        results = RecommendationContext().recommend_many(stats_list)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid stats'}, status=400)
+
+    return JsonResponse({'results': results})
+
+
+# upper bound on weapons returned by attack_rating
+MAX_AR_RESULTS = 500
+
+
+@require_POST
+def attack_rating(request):
+    """
+    Ranks the weapon catalog by attack rating for one stat profile.
+    Expects JSON body with the stat keys (as recommend_build) plus optional
+      level (0-25, default 25; somber weapons use the matching +0..+10), two_handed (bool),
+      types (list of weapon types), limit (default 20)
+    Returns { "level": n, "results": [ { id, name, type, attack_rating: { physical, ..., total } } ],
+              "unscored": number of weapons left out because their upgrade path is unknown }
+    """
+    try:
+        body = _json_body(request)
+    except Exception:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    try:
+        stats = normalise_stats(body)
+        level = int(body.get('level', MAX_LEVEL))
+        limit = int(body.get('limit', 20))
+        item_types = body.get('types') or None
+        if not 0 <= level <= MAX_LEVEL or not 0 < limit <= MAX_AR_RESULTS:
+            raise ValueError('level/limit out of range')
+        if item_types is not None and not isinstance(item_types, list):
+            raise ValueError('types must be a list')
+        results = rank_weapons(stats, level, bool(body.get('two_handed')), item_types, limit)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid stats'}, status=400)
+
+    return JsonResponse({'level': level, 'results': results, 'unscored': len(get_weapon_table().unscored)})
+
+
+@require_POST
+def optimize_stats_view(request):
+    """
+    How to spend a level budget to maximise attack rating with a weapon (or a weapon class).
+    Expects JSON body with the current stat keys (as recommend_build) plus
+      budget (levels to spend, required), weapon_id or types (list of weapon types),
+      level (0-25, default 25), two_handed (bool)
+    Returns { "results": [ { id, name, type, required_levels,
+                             pareto: [ { levels, attack_rating, stats: {strength, ...} } ] } ] }
+    best weapon first; `pareto` is empty when the requirements alone cost more than the budget.
+    A weapon_id whose upgrade path is unknown is a 400.
+    """
+    try:
+        body = _json_body(request)
+    except Exception:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    try:
+        stats = normalise_stats(body)
+        budget = int(body['budget'])
+        level = int(body.get('level', MAX_LEVEL))
+        item_types = body.get('types') or None
+        weapon_id = body.get('weapon_id')
+        if budget < 0 or not 0 <= level <= MAX_LEVEL:
+            raise ValueError('budget/level out of range')
+        if weapon_id is None and not isinstance(item_types, list):
+            raise ValueError('weapon_id or types is required')
+        weapon_ids = None if weapon_id is None else [int(weapon_id)]
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid stats'}, status=400)
+
+    try:
+        results = optimize_stats(
+            stats, budget, level, bool(body.get('two_handed')), weapon_ids=weapon_ids, item_types=item_types,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse({'results': results})
+
+
+@require_POST
+def optimize_armor_view(request):
+    """
+    Best head/body/arms/legs set under a weight cap.
+    Expects JSON body { objective: {feature: weight, ...} (optional), max_weight: float (optional) }
+    where features are armor.json absorptions (physical, strike, ..., holy) and resistances
+    (immunity, robustness, focus, vitality, poise).
+    Returns { head, body, arms, legs (each a small item dict or null), weight, score }
+    """
+    try:
+        body = _json_body(request)
+    except Exception:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    try:
+        if not isinstance(body, dict):
+            raise ValueError('expected an object')
+        loadout = optimize_armor(body.get('objective'), body.get('max_weight'))
+    except (TypeError, ValueError) as e:
+        return JsonResponse({'error': str(e) or 'Invalid request'}, status=400)
+
+    by_id = get_catalog().by_id
+    payload = {slot: item_to_small_dict(by_id.get(loadout[slot])) for slot in ('head', 'body', 'arms', 'legs')}
+    payload.update(weight=loadout['weight'], score=loadout['score'])
+    return JsonResponse(payload)
+
+
+@require_POST
+def rank_spells_view(request):
+    """
+    Spells ranked for a stat profile, plus the best set for a memory-slot budget.
+    Expects JSON body with the stat keys (as recommend_build) plus optional
+      memory_slots (1-14, default 4), kind ("sorcery" or "incantation"), limit (default 20)
+    Returns { ranking: [...], selection: [...], slots_used }
+    with spells as { id, name, kind, fp_cost, slots_used, score }.
+    """
+    try:
+        body = _json_body(request)
+    except Exception:
+        return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+    try:
+        stats = normalise_stats(body)
+        memory_slots = int(body.get('memory_slots', DEFAULT_MEMORY_SLOTS))
+        limit = int(body.get('limit', 20))
+        kind = body.get('kind')
+        if not 1 <= memory_slots <= MAX_MEMORY_SLOTS or not 0 <= limit <= 200:
+            raise ValueError('memory_slots/limit out of range')
+        if kind is not None and kind not in SPELL_KINDS:
+            raise ValueError('unknown kind')
+        payload = rank_spells(stats, memory_slots, kind, limit)
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'Invalid stats'}, status=400)
+
+    return JsonResponse(payload)
+
+
 # ------------------------------
 # Utility endpoints used by front-end
 # ------------------------------
@@ -554,16 +822,54 @@ def get_or_create_custom_build(user):
     }
 
 
+GET_ITEMS_TYPES = ['head', 'body', 'arms', 'legs', 'talisman', 'spell', 'ash_of_war']
+
+
+def _request_catalog_version(request):
+    """Catalog version for this request, read once and shared by the ETag, Last-Modified and body."""
+    version = getattr(request, '_catalog_version', None)
+    if version is None:
+        version = request._catalog_version = get_catalog_version()
+    return version
+
+
+def _get_items_payload(item_type, version):
+    """Serialized get_items body for one type, kept on the catalog snapshot of `version`."""
+    catalog = get_catalog(version)
+    if item_type not in GET_ITEMS_TYPES and item_type != 'weapon':
+        item_type = None
+
+    def build():
+        if item_type == 'spell':
+            items = catalog.of_types(SPELL_TYPES)
+        elif item_type == 'weapon':
+            items = catalog.of_types(ALL_WEAPON_TYPES)
+        elif item_type is not None:
+            items = catalog.of_type(item_type)
+        else:
+            items = ()
+        return json.dumps([{'id': i.id, 'name': i.name, 'image_url': i.image_url} for i in items]).encode('utf-8')
+
+    return catalog.serialized(('get_items', item_type), build)
+
+
+def _get_items_etag(request):
+    item_type = request.GET.get('type') or ''
+    return hashlib.sha1(f'{_request_catalog_version(request)}:{item_type}'.encode('utf-8')).hexdigest()
+
+
+def _get_items_last_modified(request):
+    return get_catalog_last_modified(_request_catalog_version(request))
+
+
 @require_GET
+@condition(etag_func=_get_items_etag, last_modified_func=_get_items_last_modified)
 def get_items(request):
-    item_type = request.GET.get('type')
-    if item_type in ['head', 'body', 'arms', 'legs', 'talisman', 'spell', 'ash_of_war']:
-        items = Item.objects.filter(type=item_type).values('id', 'name', 'image_url')
-    elif item_type == 'weapon':
-        items = Item.objects.filter(type__in=ALL_WEAPON_TYPES).values('id', 'name', 'image_url')
-    else:
-        items = Item.objects.none()
-    return JsonResponse(list(items), safe=False)
+    # conditional requests that still match the catalog version get a 304 before we get here
+    payload = _get_items_payload(request.GET.get('type'), _request_catalog_version(request))
+    response = HttpResponse(payload, content_type='application/json')
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
 
 
 
@@ -586,10 +892,12 @@ def save_as_preset(request):
     name = data.get('name')
     description = data.get('description', '')
     custom_build = request.session.get('custom_build', {})
-    build = Build.objects.create(name=name, description=description)
-    for slot_name, item_id in custom_build.items():
-        if item_id:
-            EquipmentSlot.objects.create(build=build, slot_name=slot_name, item_id=item_id)
+    # one transaction: the ML indexes only hear about the build once all its slots exist
+    with transaction.atomic():
+        build = Build.objects.create(name=name, description=description)
+        for slot_name, item_id in custom_build.items():
+            if item_id:
+                EquipmentSlot.objects.create(build=build, slot_name=slot_name, item_id=item_id)
     return JsonResponse({'status': 'success'})
 
 
@@ -0,0 +1,99 @@
+# file: ml/ann.py
+import numpy as np
+
+
+def normalize_rows(Z: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(Z, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return Z / norms
+
+
+def spherical_kmeans(Z: np.ndarray, k: int, n_iter: int, rng) -> np.ndarray:
+    """k unit-length centroids for unit-length rows of Z (cosine k-means, Lloyd iterations)."""
+    k = min(k, len(Z))
+    centroids = Z[rng.choice(len(Z), size=k, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = np.argmax(Z @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, Z)
+        empty = ~sums.any(axis=1)
+        if empty.any():
+            # re-seed empty lists on random points so every list stays in use
+            sums[empty] = Z[rng.choice(len(Z), size=int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids.astype(np.float32)
+
+
+def pca_projection(X, dim: int, rng, n_iter: int = 3) -> np.ndarray:
+    """
+    vocab x dim basis of X's top right-singular vectors (randomized range finder + small SVD).
+    Keeps the directions that separate builds, unlike a purely random projection.
+    """
+    vocab = X.shape[1]
+    dim = min(dim, vocab, X.shape[0])
+    basis = rng.standard_normal((vocab, dim + 10)).astype(np.float32)
+    for _ in range(n_iter):
+        basis, _ = np.linalg.qr(np.asarray(X.T @ (X @ basis), dtype=np.float32))
+    _, _, vt = np.linalg.svd(np.asarray(X @ basis), full_matrices=False)
+    return (basis @ vt[:dim].T).astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour candidates for L2-normalised sparse rows (the TF-IDF matrix).
+
+    Rows are projected onto their top `dim` principal directions, partitioned into `n_lists` inverted
+    lists by spherical k-means (trained on a sample), and a query only visits the `n_probe` lists
+    whose centroids are closest. Callers re-rank the candidates exactly, so `n_probe` trades
+    recall for latency: n_probe == n_lists is exact search.
+    """
+
+    def __init__(self, X, dim: int = 64, n_lists: int = None, n_iter: int = 8, sample: int = 50_000, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        n = X.shape[0]
+        sampled = np.sort(rng.choice(n, size=sample, replace=False)) if n > sample else slice(None)
+        self.projection = pca_projection(X[sampled], dim, rng)
+        Z = self.project(X)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        train = Z[sampled]
+        self.centroids = spherical_kmeans(train, n_lists, n_iter, rng)
+        self._set_lists(self.assign(Z))
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def __len__(self):
+        return len(self.list_of)
+
+    def project(self, X) -> np.ndarray:
+        return normalize_rows(np.asarray(X @ self.projection, dtype=np.float32))
+
+    def assign(self, Z: np.ndarray, chunk: int = 65_536) -> np.ndarray:
+        return np.concatenate([
+            np.argmax(Z[i:i + chunk] @ self.centroids.T, axis=1) for i in range(0, len(Z), chunk)
+        ]) if len(Z) else np.empty(0, dtype=np.int64)
+
+    def _set_lists(self, list_of: np.ndarray):
+        # CSR-style inverted lists: members[offsets[l]:offsets[l + 1]] are the rows of list l
+        self.list_of = list_of
+        self.members = np.argsort(list_of, kind="stable")
+        self.offsets = np.searchsorted(list_of[self.members], np.arange(self.n_lists + 1))
+
+    def extended(self, X_new) -> "IVFIndex":
+        """Copy with rows appended (assigned to the existing lists; no re-training)."""
+        new = IVFIndex.__new__(IVFIndex)
+        new.projection, new.centroids = self.projection, self.centroids
+        new._set_lists(np.concatenate([self.list_of, self.assign(self.project(X_new))]))
+        return new
+
+    def candidates(self, q, n_probe: int) -> np.ndarray:
+        """Sorted row ids in the `n_probe` lists nearest to query row `q` (1 x vocab)."""
+        n_probe = min(max(1, n_probe), self.n_lists)
+        scores = self.centroids @ self.project(q)[0]
+        if n_probe < self.n_lists:
+            lists = np.argpartition(-scores, n_probe - 1)[:n_probe]
+        else:
+            lists = np.arange(self.n_lists)
+        rows = [self.members[self.offsets[l]:self.offsets[l + 1]] for l in lists]
+        return np.sort(np.concatenate(rows)) if rows else np.empty(0, dtype=np.int64)
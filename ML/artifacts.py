@@ -0,0 +1,120 @@
+# file: ml/artifacts.py
+import hashlib
+import os
+import tempfile
+import threading
+
+import joblib
+import sklearn
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+ARTIFACT_DIR = os.environ.get("ML_ARTIFACT_DIR", os.path.join(current_dir, "artifacts"))
+
+
+def sources_digest(paths, extra=""):
+    """
+    Hash of the input files (plus anything else the artifact depends on, e.g. a format version).
+    The scikit-learn version is included because pickled estimators aren't portable across it.
+    """
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    h.update(f"|sklearn={sklearn.__version__}|{extra}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def save_artifact(obj, path):
+    """Write atomically so concurrent workers never read a half-written file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            joblib.dump(obj, f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def load_artifact(path):
+    try:
+        return joblib.load(path)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # corrupt / incompatible file: treat as missing and let the caller rebuild it
+        return None
+
+
+class LazyArtifact:
+    """
+    A fitted object (or dict of them) keyed by a hash of its source files.
+
+    get()       -> in-memory copy; loads the saved artifact, or builds + saves it on first use
+    load()      -> load only from disk (no fitting), e.g. to warm a worker at boot
+    rebuild()   -> always refit and overwrite the saved artifact
+    """
+
+    def __init__(self, name, sources, build, version="1"):
+        self.name = name
+        self.sources = sources
+        self.build = build
+        self.version = version
+        self._value = None
+        self._digest = None
+        self._lock = threading.Lock()
+
+    def source_paths(self):
+        # a callable lets the inputs move (e.g. to the current feature-store version)
+        return self.sources() if callable(self.sources) else self.sources
+
+    def digest(self):
+        # sources only change on deploy (i.e. with a new process) or through rebuild()
+        if self._digest is None:
+            self._digest = sources_digest(self.source_paths(), extra=f"{self.name}:{self.version}")
+        return self._digest
+
+    def path(self, digest=None):
+        digest = digest or self.digest()
+        return os.path.join(ARTIFACT_DIR, f"{self.name}-{digest[:16]}.joblib")
+
+    def load(self):
+        with self._lock:
+            if self._value is None:
+                self._value = load_artifact(self.path())
+            return self._value
+
+    def get(self):
+        value = self._value
+        if value is not None:
+            return value
+        with self._lock:
+            if self._value is None:
+                path = self.path()
+                value = load_artifact(path)
+                if value is None:
+                    value = self.build()
+                    try:
+                        save_artifact(value, path)
+                    except OSError:
+                        # read-only deploys still work, they just refit per process
+                        pass
+                self._value = value
+            return self._value
+
+    def rebuild(self):
+        self._digest = None
+        value = self.build()
+        path = self.path()
+        save_artifact(value, path)
+        with self._lock:
+            self._value = value
+        return path
+
+    def set(self, value):
+        """Swap in a new in-memory value (readers see either the old or the new one)."""
+        with self._lock:
+            self._value = value
@@ -0,0 +1,92 @@
+# ML/bench_ann.py
+# Recall@k / QPS of the IVF index vs. exact sparse search on synthetic TF-IDF builds.
+# Run from the project root:  python -m ML.bench_ann [--sizes 10000,100000,1000000]
+
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfTransformer
+
+from ML.ann import IVFIndex
+
+VOCAB = 5000        # distinct item / tag tokens
+ARCHETYPES = 300    # build archetypes (each favours its own small set of items)
+TOKENS_PER_BUILD = 24
+TOKENS_PER_QUERY = 6
+
+
+def synthetic_counts(n, n_tokens, rng, archetype_words):
+    """Bag-of-words rows: ~75% of tokens from the row's archetype, the rest Zipf-distributed noise."""
+    archetype = rng.integers(0, ARCHETYPES, size=n)
+    own = rng.random((n, n_tokens)) < 0.75
+    from_archetype = archetype_words[archetype[:, None], rng.integers(0, archetype_words.shape[1], size=(n, n_tokens))]
+    noise = np.minimum(rng.zipf(1.3, size=(n, n_tokens)) - 1, VOCAB - 1)
+    cols = np.where(own, from_archetype, noise).ravel()
+    rows = np.repeat(np.arange(n), n_tokens)
+    counts = sp.csr_matrix((np.ones_like(cols, dtype=np.float32), (rows, cols)), shape=(n, VOCAB))
+    counts.sum_duplicates()
+    return counts
+
+
+def exact_kth(X, Q, k, chunk=16):
+    """Score of the k-th best row per query (ties at the boundary count as hits)."""
+    out = []
+    for i in range(0, Q.shape[0], chunk):
+        S = (X @ Q[i:i + chunk].T).toarray().T
+        out.extend(-np.partition(-S, k - 1, axis=1)[:, k - 1])
+    return np.asarray(out)
+
+
+def ann_topk(ann, X, q, k, n_probe):
+    """Exact scores of the k best candidates."""
+    rows = ann.candidates(q, n_probe)
+    sims = (X[rows] @ q.T).toarray().ravel()
+    if len(rows) > k:
+        sims = sims[np.argpartition(-sims, k - 1)[:k]]
+    return sims
+
+
+def run(n, args, rng):
+    archetype_words = rng.integers(0, VOCAB, size=(ARCHETYPES, 40))
+    tfidf = TfidfTransformer()
+    X = tfidf.fit_transform(synthetic_counts(n, TOKENS_PER_BUILD, rng, archetype_words)).tocsr().astype(np.float32)
+    Q = tfidf.transform(synthetic_counts(args.queries, TOKENS_PER_QUERY, rng, archetype_words)).tocsr().astype(np.float32)
+    print(f"\n=== {n:,} builds ({X.nnz:,} non-zeros), {args.queries} queries, k={args.k} ===")
+
+    kth = exact_kth(X, Q, args.k)
+
+    started = time.perf_counter()
+    for i in range(Q.shape[0]):
+        sims = (X @ Q[i].T).toarray().ravel()
+        np.argpartition(-sims, args.k - 1)[:args.k]
+    exact_qps = Q.shape[0] / (time.perf_counter() - started)
+    print(f"{'exact':>12}  recall@{args.k} 1.000  {exact_qps:9.1f} qps")
+
+    started = time.perf_counter()
+    ann = IVFIndex(X)
+    print(f"{'index build':>12}  {time.perf_counter() - started:.1f}s, {ann.n_lists} lists")
+
+    for n_probe in args.probes:
+        if n_probe > ann.n_lists:
+            continue
+        started = time.perf_counter()
+        found = [ann_topk(ann, X, Q[i], args.k, n_probe) for i in range(Q.shape[0])]
+        qps = Q.shape[0] / (time.perf_counter() - started)
+        recall = np.mean([np.sum(f >= t - 1e-6) / args.k for f, t in zip(found, kth)])
+        print(f"{'n_probe=' + str(n_probe):>12}  recall@{args.k} {recall:.3f}  {qps:9.1f} qps  ({qps / exact_qps:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--probes", default="1,4,8,16,32,64")
+    args = parser.parse_args()
+    args.probes = [int(p) for p in args.probes.split(",")]
+
+    rng = np.random.default_rng(0)
+    for size in args.sizes.split(","):
+        run(int(size), args, rng)
@@ -0,0 +1,77 @@
+# ML/bench_feature_store.py
+# Load cost of a feature-store version (open + presets_frame) on synthetic presets.
+# Run from the project root:  python -m ML.bench_feature_store [--sizes 10000,100000,500000]
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from ML import feature_store
+
+ITEMS = 3000       # distinct (id, name, type) items
+EMPTY_SLOT = 0.2   # share of empty slots
+
+
+def synthetic_presets(n, rng):
+    items = [
+        {"item_id": i, "item_name": f"Item {i} ’s Edge", "item_type": f"type {i % 40}"}
+        for i in range(ITEMS)
+    ]
+    picks = np.minimum(rng.zipf(1.2, size=(n, len(feature_store.SLOT_CODES))) - 1, ITEMS - 1)
+    empty = rng.random(picks.shape) < EMPTY_SLOT
+    for b in range(n):
+        yield {
+            "build_id": b + 1,
+            "name": f"Build {b}",
+            "description": f"A synthetic build number {b} for the load benchmark.",
+            "slots": {
+                code: None if empty[b, j] else items[picks[b, j]]
+                for j, code in enumerate(feature_store.SLOT_CODES)
+            },
+        }
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(n, args, rng):
+    with tempfile.TemporaryDirectory() as root:
+        # point the store at a scratch directory for the duration of the run
+        feature_store.STORE_DIR = root
+        feature_store.CURRENT_FILE = os.path.join(root, "CURRENT")
+        started = time.perf_counter()
+        version = feature_store.write_version(synthetic_presets(n, rng))["version"]
+        print(f"\n=== {n:,} builds, {ITEMS:,} items (written in {time.perf_counter() - started:.1f}s) ===")
+
+        seconds, _ = timed(lambda: feature_store.open_version(version), args.repeat)
+        print(f"{'open_version':>14}  {seconds * 1000:9.1f} ms")
+
+        seconds, df = timed(lambda: feature_store.presets_frame(version), args.repeat)
+        print(f"{'presets_frame':>14}  {seconds * 1000:9.1f} ms  {df.memory_usage(deep=True).sum() / 2**20:8.1f} MiB")
+
+        tracemalloc.start()
+        feature_store.presets_frame(version)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'peak alloc':>14}  {peak / 2**20:9.1f} MiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,500000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for size in args.sizes.split(","):
+        run(int(size), args, rng)
@@ -0,0 +1,79 @@
+# ML/bench_tag_utils.py
+# Microbenchmark: compiled tag matcher vs. the original per-synonym loops.
+# Run from the project root:  python -m ML.bench_tag_utils
+
+import re
+import timeit
+
+from ML.generate_build import weapon_catalog, armor_catalog, talisman_catalog, spell_catalog, ash_catalog
+from ML.tag_utils import TAGS, _expand_query, _tags_for_item, expand_query, tags_for_item
+
+
+# --- Reference implementation (the loops tag_utils used before compiling tags.json) ---
+def naive_expand_query(query: str) -> str:
+    q = query.lower()
+    expanded = set([q])
+    for tag, words in TAGS.items():
+        for word in words:
+            if word.lower() in q:
+                expanded.add(tag.lower())
+                expanded.update(w.lower() for w in words)
+    tokens = re.findall(r"\w+", q)
+    for token in tokens:
+        for tag, words in TAGS.items():
+            words_lower = [w.lower() for w in words]
+            if token == tag or token in words_lower:
+                expanded.add(tag.lower())
+                expanded.update(words_lower)
+    return " ".join(expanded)
+
+
+def naive_tags_for_item(item_name: str) -> set[str]:
+    n = str(item_name).lower()
+    item_tags = set()
+    for tag, words in TAGS.items():
+        words_lower = [w.lower() for w in words]
+        if tag in n or any(word in n for word in words_lower):
+            item_tags.add(tag)
+    return item_tags
+
+
+items = list(weapon_catalog) + talisman_catalog + spell_catalog + ash_catalog
+for values in armor_catalog.values():
+    items += values
+queries = [
+    "bleed katana", "dual rivers of blood build", "pure faith incantation caster",
+    "strength colossal weapon with frost", "int sorcery moonveil magic", "arcane poison dex",
+]
+
+# 1. Same answers
+for item in items:
+    assert tags_for_item(item) == naive_tags_for_item(item), item
+for q in queries:
+    assert set(expand_query(q).split()) == set(naive_expand_query(q).split()), q
+print(f"OK: identical tags for {len(items)} items and {len(queries)} queries")
+
+
+# 2. Timings (per full pass over the catalog, the work pick_best does per request)
+def bench(label, fn, number=20):
+    t = min(timeit.repeat(fn, number=number, repeat=3)) / number
+    print(f"{label:<40} {t * 1000:8.3f} ms")
+    return t
+
+
+def cold(fn, cached, inputs):
+    def run():
+        cached.cache_clear()
+        for x in inputs:
+            fn(x)
+    return run
+
+
+naive = bench("tags_for_item  naive", lambda: [naive_tags_for_item(i) for i in items])
+compiled = bench("tags_for_item  automaton (cold cache)", cold(tags_for_item, _tags_for_item, items))
+warm = bench("tags_for_item  automaton (memoized)", lambda: [tags_for_item(i) for i in items])
+print(f"  speedup: {naive / compiled:.1f}x cold, {naive / warm:.1f}x memoized")
+
+naive = bench("expand_query   naive", lambda: [naive_expand_query(q) for q in queries], number=200)
+compiled = bench("expand_query   automaton (cold cache)", cold(expand_query, _expand_query, queries), number=200)
+print(f"  speedup: {naive / compiled:.1f}x")
@@ -0,0 +1,325 @@
+# file: ml/feature_store.py
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from .artifacts import ARTIFACT_DIR
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+csv_path = os.path.join(current_dir, "../ml_presets_V5.6.csv")
+
+STORE_DIR = os.path.join(ARTIFACT_DIR, "feature_store")
+CURRENT_FILE = os.path.join(STORE_DIR, "CURRENT")
+MANIFEST = "manifest.json"
+KEEP_VERSIONS = 3
+
+# Slot columns, in the ml_presets CSV order
+SLOT_CODES = [
+    "RH1", "RH2", "LH1", "LH2",
+    "Helms", "Chest Armor", "Gauntlets", "Greaves",
+    "Talisman1", "Talisman2", "Talisman3", "Talisman4",
+    "Spell1", "Spell2", "Spell3", "Spell4",
+    "AshOfWar1", "AshOfWar2",
+]
+
+# On-disk layout of one version (ML/artifacts/feature_store/v000001/); every array is a plain
+# .npy so it can be memory-mapped:
+#   build_id.npy                  int64 (builds,)
+#   slots.npy                     int32 (builds, len(SLOT_CODES)), row in the item table, -1 = empty
+#   item_id.npy                   int64 (items,), -1 = unknown id
+#   <column>.offsets/.bytes.npy   utf-8 blob + offsets: build_name, build_description, item_name, item_type
+#   manifest.json                 version, parent version, counts, max_build_id, slot codes
+
+
+# ------------------------------
+# Strings as blob + offsets (mmap-friendly, no fixed-width padding)
+# ------------------------------
+def _save_strings(path, name, values):
+    encoded = [("" if v is None else str(v)).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    np.save(os.path.join(path, f"{name}.offsets.npy"), offsets)
+    np.save(os.path.join(path, f"{name}.bytes.npy"), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+
+class StringColumn:
+    """
+    A blob + offsets string column, left memory-mapped: nothing is decoded until it is read.
+    Indexing decodes one string; iterating decodes the whole column in one pass.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+        self._factorized = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def tolist(self):
+        data = self.blob.tobytes()
+        bounds = self.offsets.tolist()
+        try:
+            # all-ASCII (the usual case): byte offsets are character offsets, slice the decoded text
+            text = data.decode("ascii")
+        except UnicodeDecodeError:
+            return [data[a:b].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+        return [text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+    def categorical(self, rows):
+        """
+        pd.Categorical of the strings at `rows` (-1 = missing), with "" as missing too.
+        Each distinct string is decoded once, however many rows repeat it.
+        """
+        if self._factorized is None:
+            self._factorized = pd.factorize(np.array([v or np.nan for v in self.tolist()], dtype=object))
+        codes, categories = self._factorized
+        rows = np.asarray(rows)
+        return pd.Categorical.from_codes(np.where(rows < 0, -1, codes[rows]), categories=categories)
+
+
+def _load_strings(path, name, mmap_mode="r"):
+    offsets = np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode=mmap_mode)
+    blob = np.load(os.path.join(path, f"{name}.bytes.npy"), mmap_mode=mmap_mode)
+    return StringColumn(offsets, blob)
+
+
+# ------------------------------
+# Versions
+# ------------------------------
+def version_path(version):
+    return os.path.join(STORE_DIR, version)
+
+
+def current_version():
+    """Version named by CURRENT (ML_FEATURE_STORE_VERSION pins one), or None if no store exists."""
+    pinned = os.environ.get("ML_FEATURE_STORE_VERSION")
+    if pinned:
+        return pinned
+    try:
+        with open(CURRENT_FILE, encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(version):
+    with open(os.path.join(version_path(version), MANIFEST), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dataset_path(version=None):
+    """File whose bytes identify the presets dataset: the store manifest, or the legacy CSV."""
+    version = version or current_version()
+    if version:
+        return os.path.join(version_path(version), MANIFEST)
+    return csv_path
+
+
+def _next_version():
+    existing = [v for v in os.listdir(STORE_DIR) if v.startswith("v") and v[1:].isdigit()] if os.path.isdir(STORE_DIR) else []
+    return f"v{max([int(v[1:]) for v in existing], default=0) + 1:06d}"
+
+
+def _publish(version):
+    tmp = CURRENT_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, CURRENT_FILE)
+
+    versions = sorted(v for v in os.listdir(STORE_DIR) if v.startswith("v") and v[1:].isdigit())
+    for old in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(version_path(old), ignore_errors=True)
+
+
+# ------------------------------
+# Write
+# ------------------------------
+class _Columns:
+    def __init__(self):
+        self.build_ids, self.names, self.descriptions, self.slots = [], [], [], []
+        self.items = {}  # (item_id, name, type) -> row in the item table
+
+    def item_row(self, slot):
+        item_id = slot.get("item_id")
+        # keyed on all three so legacy CSV rows (a name without an id) survive a round-trip
+        key = (-1 if item_id is None else int(item_id), slot.get("item_name"), slot.get("item_type"))
+        if key == (-1, None, None):
+            return -1
+        return self.items.setdefault(key, len(self.items))
+
+    def add(self, preset):
+        self.build_ids.append(int(preset["build_id"]))
+        self.names.append(preset.get("name") or "")
+        self.descriptions.append(preset.get("description") or "")
+        self.slots.append([self.item_row(preset["slots"].get(code) or {}) for code in SLOT_CODES])
+
+
+def write_version(presets, base=None):
+    """
+    Materialize presets ({build_id, name, description, slots: {code: {item_id, item_name, item_type}}},
+    e.g. EldenRingInsider.presets.iter_presets) as a new version and make it current.
+    With `base`, the new version is that version plus `presets` (builds already present are replaced).
+    Returns the manifest.
+    """
+    cols = _Columns()
+    new = list(presets)
+    new_ids = {int(p["build_id"]) for p in new}
+    if base:
+        for preset in iter_version(base):
+            if preset["build_id"] not in new_ids:
+                cols.add(preset)
+    for preset in new:
+        cols.add(preset)
+
+    order = np.argsort(np.asarray(cols.build_ids, dtype=np.int64), kind="stable")
+    version = _next_version()
+    path = version_path(version)
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    items = sorted(cols.items, key=cols.items.get)
+    np.save(os.path.join(tmp, "build_id.npy"), np.asarray(cols.build_ids, dtype=np.int64)[order])
+    np.save(os.path.join(tmp, "slots.npy"), np.asarray(cols.slots, dtype=np.int32).reshape(-1, len(SLOT_CODES))[order])
+    np.save(os.path.join(tmp, "item_id.npy"), np.asarray([item_id for item_id, _, _ in items], dtype=np.int64))
+    _save_strings(tmp, "build_name", [cols.names[i] for i in order])
+    _save_strings(tmp, "build_description", [cols.descriptions[i] for i in order])
+    _save_strings(tmp, "item_name", [name for _, name, _ in items])
+    _save_strings(tmp, "item_type", [item_type for _, _, item_type in items])
+
+    manifest = {
+        "version": version,
+        "parent": base,
+        "created": time.time(),
+        "builds": len(cols.build_ids),
+        "items": len(items),
+        "max_build_id": max(cols.build_ids, default=0),
+        "slot_codes": SLOT_CODES,
+    }
+    with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(tmp, path)
+    _publish(version)
+    return manifest
+
+
+def presets_from_frame(df: pd.DataFrame):
+    """Presets from a table in the ml_presets CSV layout (e.g. to seed the store from a legacy CSV)."""
+    value = lambda v: None if pd.isna(v) else v
+    for row in df.to_dict("records"):
+        slots = {}
+        for code in SLOT_CODES:
+            item_id = value(row.get(f"{code}_item_id"))
+            slots[code] = {
+                "item_id": None if item_id is None else int(item_id),
+                "item_name": value(row.get(code)),
+                "item_type": value(row.get(f"{code}_item_type")),
+            }
+        yield {
+            "build_id": int(row["build_id"]),
+            "name": value(row.get("name")),
+            "description": value(row.get("description")),
+            "slots": slots,
+        }
+
+
+# ------------------------------
+# Read
+# ------------------------------
+def open_version(version=None):
+    """Memory-mapped arrays of a version: build_id, slots, item_id and the string columns (StringColumn)."""
+    version = version or current_version()
+    path = version_path(version)
+    return {
+        "version": version,
+        "build_id": np.load(os.path.join(path, "build_id.npy"), mmap_mode="r"),
+        "slots": np.load(os.path.join(path, "slots.npy"), mmap_mode="r"),
+        "item_id": np.load(os.path.join(path, "item_id.npy"), mmap_mode="r"),
+        "build_name": _load_strings(path, "build_name"),
+        "build_description": _load_strings(path, "build_description"),
+        "item_name": _load_strings(path, "item_name"),
+        "item_type": _load_strings(path, "item_type"),
+    }
+
+
+def _item_table(store):
+    """Item columns with unknown ids / empty strings as NaN (the CSV's missing values)."""
+    ids = np.asarray(store["item_id"], dtype=np.float64)
+    ids[ids < 0] = np.nan
+    names = np.array([n or np.nan for n in store["item_name"].tolist()], dtype=object)
+    types = np.array([t or np.nan for t in store["item_type"].tolist()], dtype=object)
+    return ids, names, types
+
+
+def iter_version(version):
+    """Presets of a stored version, in the same dict shape write_version consumes."""
+    store = open_version(version)
+    ids, names, types = _item_table(store)
+    build_names, descriptions = store["build_name"].tolist(), store["build_description"].tolist()
+    value = lambda v: None if pd.isna(v) else v
+    for row, build_id in enumerate(store["build_id"]):
+        slots = {}
+        for code, item in zip(SLOT_CODES, store["slots"][row]):
+            if item < 0:
+                slots[code] = {"item_id": None, "item_name": None, "item_type": None}
+            else:
+                item_id = value(ids[item])
+                slots[code] = {
+                    "item_id": None if item_id is None else int(item_id),
+                    "item_name": value(names[item]),
+                    "item_type": value(types[item]),
+                }
+        yield {
+            "build_id": int(build_id),
+            "name": build_names[row],
+            "description": descriptions[row],
+            "slots": slots,
+        }
+
+
+def presets_frame(version=None) -> pd.DataFrame:
+    """
+    The presets table in the ml_presets CSV layout (build_id, name, description,
+    <slot>_item_id, <slot>, <slot>_item_type, ...), from the feature store when one exists,
+    else from the legacy CSV. From the store, the slot name / type columns are categoricals.
+    """
+    version = version or current_version()
+    if not version:
+        try:
+            return pd.read_csv(csv_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No feature store under {STORE_DIR} and no CSV at: {csv_path}")
+
+    store = open_version(version)
+    ids = np.asarray(store["item_id"], dtype=np.float64)
+    ids[ids < 0] = np.nan
+    # one extra missing id at the end; empty slots (-1) index it
+    ids = np.append(ids, np.nan)
+    slots = np.asarray(store["slots"])
+
+    columns = {
+        "build_id": np.asarray(store["build_id"]),
+        "name": [n or np.nan for n in store["build_name"].tolist()],
+        "description": [d or np.nan for d in store["build_description"].tolist()],
+    }
+    for j, code in enumerate(SLOT_CODES):
+        rows = slots[:, j]
+        columns[f"{code}_item_id"] = ids[rows]
+        # item names / types repeat across builds: categorical codes over the item table
+        columns[code] = store["item_name"].categorical(rows)
+        columns[f"{code}_item_type"] = store["item_type"].categorical(rows)
+    return pd.DataFrame(columns)
@@ -1,17 +1,14 @@
 # file: ml/generate_build.py
 import pandas as pd
 import numpy as np
-import os
+import threading
+from functools import lru_cache
 
-from .tag_utils import expand_query, tags_for_item
+from .feature_store import presets_frame
+from .tag_utils import TAGS, expand_query, tags_for_item
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
-csv_path = os.path.join(current_dir, "../ml_presets_V5.6.csv")
-
-try:
-    raw_df = pd.read_csv(csv_path)
-except FileNotFoundError:
-    raise FileNotFoundError(f"CSV file not found at: {csv_path}")
+# current feature-store version (memory-mapped), or ml_presets_V5.6.csv when none has been built
+raw_df = presets_frame()
 
 slots = {
     "weapons": ["RH1", "RH2", "LH1", "LH2"],
@@ -27,42 +24,195 @@ def uniq(values):
     return sorted(set(vals))
 
 
-weapon_catalog = uniq(pd.concat([raw_df[c] for c in slots["weapons"]], ignore_index=True))
-armor_catalog = {k: uniq(raw_df[k]) for k in slots["armor"]}
-talisman_catalog = uniq(pd.concat([raw_df[c] for c in slots["talismans"]], ignore_index=True))
-spell_catalog = uniq(pd.concat([raw_df[c] for c in slots["spells"]], ignore_index=True))
-ash_catalog = uniq(pd.concat([raw_df[c] for c in slots["ashes"]], ignore_index=True))
-
 rng = np.random.default_rng(7)
 
+# Strong boosts for certain synergies: (query tag, item name substring, bonus)
+BOOST_RULES = [
+    ("bleed", "lord of blood's exultation", 5),
+    ("strength", "shard of alexander", 5),
+    ("int", "graven-mass talisman", 5),
+]
+# Intersection bonus when an item shares at least this many tags with the query
+INTERSECTION_MIN, INTERSECTION_BONUS = 2, 3
+
+tag_vocab = list(dict.fromkeys(list(TAGS) + [tag for tag, _, _ in BOOST_RULES]))
+tag_column = {tag: i for i, tag in enumerate(tag_vocab)}
+
+
+class CompiledCatalog:
+    """
+    A catalog precompiled for scoring: one row per item holding its tag bitmask
+    (items x tags, 0/1) and the boosts it earns per query tag (items x tags).
+    """
+
+    def __init__(self, items):
+        self.items = [str(item) for item in items if pd.notna(item)]
+        self.names = np.array(self.items, dtype=object)
+        self.tag_bits = np.zeros((len(self.items), len(tag_vocab)), dtype=np.int64)
+        self.boosts = np.zeros((len(self.items), len(tag_vocab)), dtype=np.int64)
+        for i, item in enumerate(self.items):
+            for tag in tags_for_item(item):
+                self.tag_bits[i, tag_column[tag]] = 1
+            for tag, needle, bonus in BOOST_RULES:
+                if needle in item.lower():
+                    self.boosts[i, tag_column[tag]] += bonus
+
+    def __len__(self):
+        return len(self.items)
+
+    def scores(self, query_tags: set[str]) -> np.ndarray:
+        q = np.zeros(len(tag_vocab), dtype=np.int64)
+        for tag in query_tags:
+            if tag in tag_column:
+                q[tag_column[tag]] = 1
+        overlap = self.tag_bits @ q
+        return overlap + self.boosts @ q + INTERSECTION_BONUS * (overlap >= INTERSECTION_MIN)
+
+
+@lru_cache(maxsize=64)
+def _compile(items: tuple) -> CompiledCatalog:
+    return CompiledCatalog(items)
+
+
+def compiled(catalog) -> CompiledCatalog:
+    return catalog if isinstance(catalog, CompiledCatalog) else _compile(tuple(catalog))
+
 
 def pick_best(catalog, query_tags: set[str], k: int = 1, used_items: set = None):
     used_items = used_items if used_items is not None else set()
-    scored = []
-    if not catalog:
+    if not len(catalog):
         return []
-    filtered_catalog = [str(item) for item in catalog if pd.notna(item) and str(item) not in used_items]
-    for item in filtered_catalog:
-        item_tags = tags_for_item(item)
-        score = len(query_tags & item_tags)
-        # Strong boosts for certain synergies
-        if "bleed" in query_tags and "lord of blood's exultation" in item.lower():
-            score += 5
-        if "strength" in query_tags and "shard of alexander" in item.lower():
-            score += 5
-        if "int" in query_tags and "graven-mass talisman" in item.lower():
-            score += 5
-        # Intersection bonus
-        if len(query_tags & item_tags) >= 2:
-            score += 3
-
-        score += rng.random() * 0.01
-        scored.append((score, item))
-    scored.sort(reverse=True)
-    return [x[1] for x in scored[:k]]
+    cat = compiled(catalog)
+
+    keep = np.ones(len(cat.items), dtype=bool)
+    if used_items:
+        keep = np.array([item not in used_items for item in cat.items], dtype=bool)
+    idx = np.flatnonzero(keep)
+    if not len(idx):
+        return []
+
+    # tiny random tie-breaker, one draw per candidate in catalog order
+    score = cat.scores(query_tags)[idx] + rng.random(len(idx)) * 0.01
+    if k < len(idx):
+        # partial sort: everything scoring at least the k-th best (ties included)
+        kth = np.partition(score, len(idx) - k)[len(idx) - k]
+        top = np.flatnonzero(score >= kth)
+        idx, score = idx[top], score[top]
+    # best first, ties by name descending (same order as sorting (score, item) tuples)
+    order = sorted(range(len(idx)), key=lambda j: (score[j], cat.items[idx[j]]), reverse=True)
+    return [cat.items[idx[j]] for j in order[:k]]
+
+
+class ArmorSetIndex:
+    """
+    Distinct (helm, chest, gauntlets, greaves) sets from the presets, in first-seen order, with an
+    inverted tag -> set ids index over the helm + chest tags.
+    When several sets match a query, the earliest one in the presets wins (what the old row scan did).
+    """
+
+    def __init__(self, df: pd.DataFrame = None):
+        self.sets = []
+        self.tag_sets = {}
+        self.seen = set()
+        if df is not None:
+            self.add(df)
+
+    def add(self, df: pd.DataFrame):
+        for values in df[slots["armor"]].itertuples(index=False, name=None):
+            armor_set = tuple(None if pd.isna(v) else v for v in values)
+            if armor_set in self.seen:
+                continue
+            self.seen.add(armor_set)
+            set_id = len(self.sets)
+            self.sets.append(armor_set)
+            helm, chest = str(values[0]), str(values[1])
+            for tag in tags_for_item(helm) | tags_for_item(chest):
+                self.tag_sets.setdefault(tag, []).append(set_id)
+
+    def extended(self, df: pd.DataFrame) -> "ArmorSetIndex":
+        """Copy with df's new sets appended (existing set ids, and so selection order, are kept)."""
+        new = ArmorSetIndex()
+        new.sets = list(self.sets)
+        new.tag_sets = {tag: list(ids) for tag, ids in self.tag_sets.items()}
+        new.seen = set(self.seen)
+        new.add(df)
+        return new
+
+    def first_match(self, query_tags: set[str]):
+        # posting lists are ascending, so each list's head is its earliest set
+        heads = [self.tag_sets[tag][0] for tag in query_tags if tag in self.tag_sets]
+        return self.sets[min(heads)] if heads else None
+
+
+def slot_values(df: pd.DataFrame, category: str) -> list:
+    return list(pd.concat([df[c] for c in slots[category]], ignore_index=True))
+
+
+class BuildCatalogs:
+    """
+    Everything generate_build reads from the presets: per-category item catalogs, their compiled
+    scoring indexes and the armor-set index. Never mutated once built; updates build a new one.
+    """
+
+    def __init__(self, weapons, armor, talismans, spells, ashes, armor_sets):
+        self.weapon_catalog = weapons
+        self.armor_catalog = armor
+        self.talisman_catalog = talismans
+        self.spell_catalog = spells
+        self.ash_catalog = ashes
+        self.armor_sets = armor_sets
+
+        self.weapon_index = compiled(weapons)
+        self.armor_index = {k: compiled(v) for k, v in armor.items()}
+        self.talisman_index = compiled(talismans)
+        self.spell_index = compiled(spells)
+        self.ash_index = compiled(ashes)
+        self.seal_index = compiled([w for w in weapons if "seal" in str(w).lower() or "staff" in str(w).lower()])
+
+    @classmethod
+    def from_presets(cls, df: pd.DataFrame):
+        return cls(
+            uniq(slot_values(df, "weapons")),
+            {k: uniq(df[k]) for k in slots["armor"]},
+            uniq(slot_values(df, "talismans")),
+            uniq(slot_values(df, "spells")),
+            uniq(slot_values(df, "ashes")),
+            ArmorSetIndex(df),
+        )
+
+    def extended(self, df: pd.DataFrame):
+        """Catalogs with df's presets added (catalogs grow with distinct items, not with builds)."""
+        return BuildCatalogs(
+            uniq(self.weapon_catalog + slot_values(df, "weapons")),
+            {k: uniq(v + list(df[k])) for k, v in self.armor_catalog.items()},
+            uniq(self.talisman_catalog + slot_values(df, "talismans")),
+            uniq(self.spell_catalog + slot_values(df, "spells")),
+            uniq(self.ash_catalog + slot_values(df, "ashes")),
+            self.armor_sets.extended(df),
+        )
+
+
+def _publish(new: BuildCatalogs):
+    # one global assignment swaps everything generate_build reads; the module-level catalog
+    # names are kept for existing importers
+    global catalogs, weapon_catalog, armor_catalog, talisman_catalog, spell_catalog, ash_catalog
+    catalogs = new
+    weapon_catalog, armor_catalog = new.weapon_catalog, new.armor_catalog
+    talisman_catalog, spell_catalog, ash_catalog = new.talisman_catalog, new.spell_catalog, new.ash_catalog
+
+
+_publish(BuildCatalogs.from_presets(raw_df))
+_update_lock = threading.Lock()
+
+
+def add_builds(df_new: pd.DataFrame) -> None:
+    """Fold new presets (CSV column layout) into the catalogs and swap them in atomically."""
+    with _update_lock:
+        _publish(catalogs.extended(df_new))
 
 
 def generate_build(base_items=None, query: str = ""):
+    c = catalogs  # one consistent snapshot for the whole request
     q = expand_query(query)
     query_tags = set(q.split())
     used = set()
@@ -72,7 +222,7 @@ def generate_build(base_items=None, query: str = ""):
         build.update(base_items)
 
     # --- Weapon locking
-    weapon_mentions = [w for w in weapon_catalog if w and w.lower() in q]
+    weapon_mentions = [w for w in c.weapon_catalog if w and w.lower() in q]
 
     if "dual" in q and len(weapon_mentions) >= 2:
         # Lock both dual weapons
@@ -87,7 +237,7 @@ def generate_build(base_items=None, query: str = ""):
 
     # Weapons
     if not build["RH1"]:
-        picks = pick_best(weapon_catalog, query_tags, k=2, used_items=used)
+        picks = pick_best(c.weapon_index, query_tags, k=2, used_items=used)
         if picks:
             build["RH1"] = picks[0]
             used.add(picks[0])
@@ -96,36 +246,31 @@ def generate_build(base_items=None, query: str = ""):
 
     # Ashes (only if not caster)
     if not any(t in query_tags for t in ["int", "faith", "caster"]):
-        for i, a in enumerate(pick_best(ash_catalog, query_tags, k=2), start=1):
+        for i, a in enumerate(pick_best(c.ash_index, query_tags, k=2), start=1):
             build[f"AshOfWar{i}"] = a
 
     # Spells
-    for i, s in enumerate(pick_best(spell_catalog, query_tags, k=4, used_items=used), start=1):
+    for i, s in enumerate(pick_best(c.spell_index, query_tags, k=4, used_items=used), start=1):
         build[f"Spell{i}"] = s
 
     # Talismans
-    for i, t in enumerate(pick_best(talisman_catalog, query_tags, k=4, used_items=used), start=1):
+    for i, t in enumerate(pick_best(c.talisman_index, query_tags, k=4, used_items=used), start=1):
         build[f"Talisman{i}"] = t
 
     # Armor sets
-    set_found = False
-    for _, row in raw_df[slots["armor"]].iterrows():
-        set_tags = tags_for_item(str(row["Helms"])) | tags_for_item(str(row["Chest Armor"]))
-        if query_tags & set_tags:
-            build.update({c: row[c] for c in slots["armor"]})
-            set_found = True
-            break
-    if not set_found:
+    armor_set = c.armor_sets.first_match(query_tags)
+    if armor_set is not None:
+        build.update(dict(zip(slots["armor"], armor_set)))
+    else:
         for armor_slot in slots["armor"]:
-            picks = pick_best(armor_catalog[armor_slot], query_tags, k=1, used_items=used)
+            picks = pick_best(c.armor_index[armor_slot], query_tags, k=1, used_items=used)
             if picks:
                 build[armor_slot] = picks[0]
 
     # Auto add staff/seal if spells but no tool
     if any(build[s] for s in slots["spells"]):
         if not any(build.get(w) and isinstance(build[w], str) and ("seal" in build[w].lower() or "staff" in build[w].lower()) for w in slots["weapons"]):
-            seal = pick_best([w for w in weapon_catalog if "seal" in str(w).lower() or "staff" in str(w).lower()],
-                             query_tags, k=1)
+            seal = pick_best(c.seal_index, query_tags, k=1)
             if seal:
                 build["LH2"] = seal[0]
 
@@ -1,24 +1,22 @@
 # file: ml/recommend_plus.py
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
 import os
+import threading
 
-from .tag_utils import expand_query, tags_for_item
+import scipy.sparse as sp
+
+from .ann import IVFIndex
+from .artifacts import LazyArtifact
+from .feature_store import dataset_path, presets_frame
+from .tag_utils import expand_query, tags_for_item, tags_path
 
 
 def preprocess(text: str) -> str:
     return str(text).lower().replace("'", "").replace("-", " ")
 
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
-csv_path = os.path.join(current_dir, "../ml_presets_V5.6.csv")
-
-try:
-    raw_df = pd.read_csv(csv_path)
-except FileNotFoundError:
-    raise FileNotFoundError(f"CSV file not found at: {csv_path}")
 
 text_cols = [
     "RH1", "RH2", "LH1", "LH2",
@@ -41,75 +39,277 @@ def enrich_text(row: pd.Series) -> str:
     return " ".join(words)
 
 
-# Build enriched training text
-raw_df["build_text"] = raw_df.apply(enrich_text, axis=1)
-raw_df["build_text"] = raw_df["build_text"].map(preprocess)
+# Below this many presets, brute force is both exact and fast enough; above it, queries without
+# must_have go through the IVF index and only re-rank the probed lists.
+ANN_MIN_ROWS = int(os.environ.get("ML_ANN_MIN_ROWS", 20_000))
+# lists probed per query (recall/latency knob; raise for better recall)
+ANN_PROBES = int(os.environ.get("ML_ANN_PROBES", 8))
 
-# Pre-compute the vectorizer
-vectorizer = TfidfVectorizer()
-X = vectorizer.fit_transform(raw_df["build_text"])
 
+def build_ann(X):
+    return IVFIndex(X) if X.shape[0] >= ANN_MIN_ROWS else None
 
-def row_has_any(row, needles):
-    low = {str(x).lower() for x in row.values if pd.notna(x)}
-    return any(any(n in cell for n in needles) for cell in low)
 
+def build_texts(df: pd.DataFrame) -> pd.Series:
+    # Build enriched training text
+    return df.apply(enrich_text, axis=1).map(preprocess)
 
-def recommend_build(query: str, top_n: int = 5, must_have=None, boost=None):
+
+def build_index() -> dict:
+    """
+    Fit the TF-IDF model from the presets (the slow part: tag enrichment + fit).
+    """
+    df = presets_frame()
+
+    df["build_text"] = build_texts(df)
+
+    vectorizer = TfidfVectorizer()
+    X = vectorizer.fit_transform(df["build_text"])
+    item_rows, tag_rows = build_item_index(df)
+    return {
+        "raw_df": df, "vectorizer": vectorizer, "X": X,
+        "item_rows": item_rows, "tag_rows": tag_rows, "main_keys": main_keys(df),
+        "ann": build_ann(X),
+    }
+
+
+def main_keys(df: pd.DataFrame) -> list:
+    """Per-row dedupe key: the main weapon (RH1, else RH2), None when the build has neither."""
+    keys = []
+    for rh1, rh2 in zip(df["RH1"], df["RH2"]):
+        key = next((str(v) for v in (rh1, rh2) if pd.notna(v) and str(v).strip() != ""), None)
+        keys.append(key)
+    return keys
+
+
+def build_item_index(df: pd.DataFrame, offset: int = 0):
+    """
+    Inverted index over the presets: normalized item name -> row ids, and tag -> row ids.
+    Row ids start at `offset` (the position of df's first row in the full table).
+    """
+    item_rows, tag_rows = {}, {}
+    for col in text_cols:
+        for row, val in enumerate(df[col], start=offset):
+            if pd.isna(val) or str(val).strip() == "":
+                continue
+            item_rows.setdefault(preprocess(val), set()).add(row)
+            for tag in tags_for_item(val):
+                tag_rows.setdefault(tag, set()).add(row)
+    as_arrays = lambda index: {k: np.array(sorted(v), dtype=np.int64) for k, v in index.items()}
+    return as_arrays(item_rows), as_arrays(tag_rows)
+
+
+# Fitted on first use (or loaded from ML/artifacts/ when the presets dataset and tags.json hash
+# matches); rebuild with `python manage.py build_ml_index`.
+index = LazyArtifact("recommend_plus", lambda: [dataset_path(), tags_path], build_index, version="4")
+
+
+# Serialises add_builds(); readers never take it, they just see the old or the new model.
+_update_lock = threading.Lock()
+
+
+def _merge_postings(old: dict, new: dict) -> dict:
+    merged = dict(old)
+    for key, rows in new.items():
+        merged[key] = np.concatenate([old[key], rows]) if key in old else rows
+    return merged
+
+
+def add_builds(df_new: pd.DataFrame) -> int:
+    """
+    Append presets (CSV column layout) to the live index without refitting.
+
+    The fitted vocabulary and IDF weights stay fixed: new rows are transformed with the existing
+    vectorizer (words it has never seen are ignored until the next full `build_ml_index`).
+    The new model is built aside and swapped in with one assignment. Returns rows added.
+    """
+    with _update_lock:
+        model = index.get()
+        raw_df = model["raw_df"]
+        df_new = df_new[~df_new["build_id"].isin(raw_df["build_id"])]
+        if df_new.empty:
+            return 0
+
+        df_new = df_new.reindex(columns=raw_df.columns.drop("build_text")).reset_index(drop=True)
+        for col in df_new.columns:
+            # empty slots arrive as None; match the table's dtype so concat keeps it
+            if df_new[col].isna().all():
+                dtype = raw_df[col].dtype
+                df_new[col] = df_new[col].astype(dtype if dtype.kind in "fO" else "float64")
+        df_new["build_text"] = build_texts(df_new)
+        offset = len(raw_df)
+        item_rows, tag_rows = build_item_index(df_new, offset=offset)
+
+        X_new = model["vectorizer"].transform(df_new["build_text"])
+        X = sp.vstack([model["X"], X_new], format="csr")
+        ann = model.get("ann")
+        index.set({
+            **model,
+            "raw_df": pd.concat([raw_df, df_new], ignore_index=True),
+            "X": X,
+            "ann": ann.extended(X_new) if ann is not None else build_ann(X),
+            "item_rows": _merge_postings(model["item_rows"], item_rows),
+            "tag_rows": _merge_postings(model["tag_rows"], tag_rows),
+            "main_keys": model["main_keys"] + main_keys(df_new),
+        })
+        return len(df_new)
+
+
+def __getattr__(name):
+    # raw_df / vectorizer / X used to be module globals; keep them importable, but lazily
+    if name in ("raw_df", "vectorizer", "X"):
+        return index.get()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def rows_with_any(model: dict, needles) -> np.ndarray:
+    """
+    Sorted row ids of presets holding an item whose name contains any needle, or tagged with one.
+    Scans the item vocabulary (not the presets), so cost doesn't grow with the number of builds.
+    """
+    item_rows, tag_rows = model["item_rows"], model["tag_rows"]
+    hits = [tag_rows[n] for n in needles if n in tag_rows]
+    hits += [rows for name, rows in item_rows.items() if any(n in name for n in needles)]
+    if not hits:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.concatenate(hits))
+
+
+def query_text(query: str, boost=None) -> str:
     # Expand + preprocess query
     q = preprocess(expand_query(query))
 
     if boost:
         for k, times in boost.items():
             q += " " + (" ".join([preprocess(k)] * max(1, times)))
+    return q
+
+
+def top_unique(sims: np.ndarray, keys, top_n: int) -> list:
+    """
+    Indices of the `top_n` best-scoring rows with distinct keys (None never collides), best first.
+    Uses argpartition on a small candidate window, widening it only while duplicates keep the
+    result short, so the cost stays ~O(n) instead of a full sort.
+    """
+    n = len(sims)
+    k = min(n, max(2 * top_n, 16))
+    while True:
+        if k < n:
+            cand = np.argpartition(-sims, k - 1)[:k]
+        else:
+            cand = np.arange(n)
+        # best first; ties broken by row order so results are deterministic
+        cand = cand[np.lexsort((cand, -sims[cand]))]
 
-    if must_have:
-        needles = [preprocess(x) for x in must_have]
-        mask = raw_df[text_cols].apply(lambda row: row_has_any(row, needles), axis=1)
-        df = raw_df[mask].copy()
-        if df.empty:
-            return []
-        x_local = vectorizer.transform(df["build_text"])
-    else:
-        df, x_local = raw_df, X
-
-    user_vec = vectorizer.transform([q])
-    sims = cosine_similarity(user_vec, x_local).flatten()
-
-    results, seen = [], set()
-    for idx in np.argsort(sims)[-top_n:][::-1]:
-        row = df.iloc[idx]
-        key = row["RH1"] or row["RH2"]  # dedupe by main weapon
-        if key not in seen:
-            seen_items = set()
-            clean_items = {}
-            for col in text_cols:
-                val = row[col]
-                if pd.notna(val) and str(val).strip() != "":
-                    if val not in seen_items:
-                        clean_items[col] = val
-                        seen_items.add(val)
-                    else:
-                        clean_items[col] = None
-                else:
-                    clean_items[col] = None
-
-            item_tags = set()
-            for val in row[text_cols]:
-                if pd.notna(val):
-                    item_tags |= tags_for_item(val)
-
-            # Intersection bonus
-            if "bleed" in q and "katana" in q and ("katana" in item_tags and "bleed" in item_tags):
-                sims[idx] += 0.1
-
-            results.append({
-                "build_id": int(row["build_id"]),
-                "similarity": float(round(sims[idx], 3)),
-                "items": clean_items
-            })
+        picked, seen = [], set()
+        for idx in cand:
+            key = keys[idx]
+            if key is not None and key in seen:
+                continue
+            picked.append(idx)
             seen.add(key)
-    return results
+            if len(picked) == top_n:
+                return picked
+        if k >= n:
+            return picked
+        k = min(n, k * 4)
+
+
+def build_result(row: pd.Series, similarity: float, q: str) -> dict:
+    seen_items = set()
+    clean_items = {}
+    for col in text_cols:
+        val = row[col]
+        if pd.notna(val) and str(val).strip() != "":
+            if val not in seen_items:
+                clean_items[col] = val
+                seen_items.add(val)
+            else:
+                clean_items[col] = None
+        else:
+            clean_items[col] = None
+
+    item_tags = set()
+    for val in row[text_cols]:
+        if pd.notna(val):
+            item_tags |= tags_for_item(val)
+
+    # Intersection bonus
+    if "bleed" in q and "katana" in q and ("katana" in item_tags and "bleed" in item_tags):
+        similarity += 0.1
+
+    return {
+        "build_id": int(row["build_id"]),
+        "similarity": float(round(similarity, 3)),
+        "items": clean_items
+    }
+
+
+# Queries scored per sparse product; bounds the dense (queries x presets) score block.
+BATCH_SIZE = 64
+
+
+def ann_candidates(model: dict, q_vec, top_n: int, n_probe: int):
+    """
+    (rows, sims, picked) from the IVF index: probe `n_probe` lists, re-rank them exactly and
+    double the probes until top_n unique builds are found (or every list has been visited).
+    """
+    ann, X, keys = model["ann"], model["X"], model["main_keys"]
+    while True:
+        rows = ann.candidates(q_vec, n_probe)
+        sims = (X[rows] @ q_vec.T).toarray().ravel()
+        picked = top_unique(sims, [keys[r] for r in rows], top_n)
+        if len(picked) >= top_n or n_probe >= ann.n_lists:
+            return rows, sims, picked
+        n_probe *= 2
+
+
+def recommend_builds(requests, top_n: int = 5, n_probe: int = None) -> list:
+    """
+    Score many queries at once. `requests` holds query strings or dicts with
+    query / must_have / boost; returns one result list per request (same shape as recommend_build).
+
+    Rows of X and the query vectors are L2-normalised by TfidfVectorizer, so cosine similarity
+    is just the sparse product Q @ X.T. Large corpora (see ANN_MIN_ROWS) only score the
+    candidates of the IVF index; `n_probe` overrides ANN_PROBES for this call.
+    """
+    model = index.get()
+    raw_df, vectorizer, X, keys = model["raw_df"], model["vectorizer"], model["X"], model["main_keys"]
+    ann = model.get("ann")
+    n_probe = n_probe or ANN_PROBES
+    specs = [{"query": r} if isinstance(r, str) else r for r in requests]
+
+    out = []
+    for start in range(0, len(specs), BATCH_SIZE):
+        batch = specs[start:start + BATCH_SIZE]
+        texts = [query_text(s["query"], s.get("boost")) for s in batch]
+        Q = vectorizer.transform(texts)
+        scores = None if ann is not None else (Q @ X.T).toarray()
+
+        for i, (spec, q) in enumerate(zip(batch, texts)):
+            rows = None
+            if spec.get("must_have"):
+                rows = rows_with_any(model, [preprocess(x) for x in spec["must_have"]])
+                if not len(rows):
+                    out.append([])
+                    continue
+                sims = scores[i][rows] if scores is not None else (X[rows] @ Q[i].T).toarray().ravel()
+                picked = top_unique(sims, [keys[r] for r in rows], top_n)
+            elif ann is not None:
+                rows, sims, picked = ann_candidates(model, Q[i], top_n, n_probe)
+            else:
+                sims = scores[i]
+                picked = top_unique(sims, keys, top_n)
+
+            out.append([
+                build_result(raw_df.iloc[idx if rows is None else rows[idx]], sims[idx], q)
+                for idx in picked
+            ])
+    return out
+
+
+def recommend_build(query: str, top_n: int = 5, must_have=None, boost=None):
+    return recommend_builds([{"query": query, "must_have": must_have, "boost": boost}], top_n=top_n)[0]
 
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@
 import json
 import os
 import re
+from collections import deque
+from functools import lru_cache
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 tags_path = os.path.join(current_dir, "tags.json")
@@ -13,41 +15,117 @@ except FileNotFoundError:
     raise FileNotFoundError(f"tags.json not found at: {tags_path}")
 
 
-def expand_query(query: str) -> str:
+class TagMatcher:
     """
-    Expand a query with tags.json synonyms, while preserving multi-word matches
-    like 'rivers of blood' or 'dual katana'.
+    tags.json compiled once into an Aho-Corasick automaton over every tag name and synonym.
+    `find(text)` returns every pattern occurring as a substring of `text` in a single pass
+    (time linear in len(text) + matches), instead of one `in` scan per synonym.
     """
-    q = query.lower()
+
+    def __init__(self, tags: dict):
+        self.words = {tag.lower(): frozenset(w.lower() for w in words) for tag, words in tags.items()}
+
+        # pattern -> tags it implies
+        self.item_tags = {}   # tag name or synonym (tags_for_item)
+        self.word_tags = {}   # synonym only (expand_query substring pass)
+        self.token_tags = {}  # exact token == tag or synonym (expand_query token pass)
+        for tag, words in tags.items():
+            self.item_tags.setdefault(tag, set()).add(tag)
+            self.token_tags.setdefault(tag, set()).add(tag.lower())
+            for word in words:
+                w = word.lower()
+                self.item_tags.setdefault(w, set()).add(tag)
+                self.word_tags.setdefault(w, set()).add(tag.lower())
+                self.token_tags.setdefault(w, set()).add(tag.lower())
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [frozenset()]
+        self._compile(set(self.item_tags))
+
+    def _compile(self, patterns):
+        out = [set()]
+        for pattern in patterns:
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    out.append(set())
+                state = nxt
+            out[state].add(pattern)
+
+        # breadth-first: each state's failure link points at its longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                out[nxt] |= out[self._fail[nxt]]
+        self._out = [frozenset(o) for o in out]
+
+    def find(self, text: str) -> set[str]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found = set(out[0])  # empty patterns match everything
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+matcher = TagMatcher(TAGS)
+
+
+@lru_cache(maxsize=4096)
+def _expand_query(q: str) -> str:
     expanded = set([q])
 
+    def add(tags):
+        for tag in tags:
+            expanded.add(tag)
+            expanded.update(matcher.words[tag])
+
     # Multi-word expansions first
-    for tag, words in TAGS.items():
-        for word in words:
-            if word.lower() in q:
-                expanded.add(tag.lower())
-                expanded.update(w.lower() for w in words)
+    for pattern in matcher.find(q):
+        add(matcher.word_tags.get(pattern, ()))
 
     # Token-based fallback
-    tokens = re.findall(r"\w+", q)
-    for token in tokens:
-        for tag, words in TAGS.items():
-            words_lower = [w.lower() for w in words]
-            if token == tag or token in words_lower:
-                expanded.add(tag.lower())
-                expanded.update(words_lower)
+    for token in re.findall(r"\w+", q):
+        add(matcher.token_tags.get(token, ()))
 
     return " ".join(expanded)
 
 
+def expand_query(query: str) -> str:
+    """
+    Expand a query with tags.json synonyms, while preserving multi-word matches
+    like 'rivers of blood' or 'dual katana'.
+    """
+    return _expand_query(query.lower())
+
+
+@lru_cache(maxsize=8192)
+def _tags_for_item(n: str) -> frozenset:
+    tags = set()
+    for pattern in matcher.find(n):
+        tags |= matcher.item_tags[pattern]
+    return frozenset(tags)
+
+
 def tags_for_item(item_name: str) -> set[str]:
     """
     Return all tags from tags.json that apply to this item name.
     """
-    n = str(item_name).lower()
-    item_tags = set()
-    for tag, words in TAGS.items():
-        words_lower = [w.lower() for w in words]
-        if tag in n or any(word in n for word in words_lower):
-            item_tags.add(tag)
-    return item_tags
+    # copy: callers are free to mutate the result
+    return set(_tags_for_item(str(item_name).lower()))
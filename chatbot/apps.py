@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ChatbotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chatbot'
+
+    def ready(self):
+        if getattr(settings, 'ML_EAGER_LOAD', False):
+            from ML.recommend_plus import index
+            # disk only: a missing/stale artifact falls back to lazy fitting on first request
+            index.load()
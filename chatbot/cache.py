@@ -0,0 +1,82 @@
+# chatbot/cache.py
+import hashlib
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+
+from EldenRingInsider.presets import get_presets_version
+from ML.recommend_plus import index, preprocess
+from ML.tag_utils import expand_query
+
+# Results live in the Django cache (shared by every worker: the database cache by default, or Redis).
+# The TTL bounds staleness; size is bounded by the backend (MAX_ENTRIES / Redis maxmemory LRU).
+RESULT_TIMEOUT = getattr(settings, 'CHATBOT_CACHE_TIMEOUT', 60 * 60)
+KEY_PREFIX = 'chatbot:result'
+HITS_KEY = 'chatbot:stats:hits'
+MISSES_KEY = 'chatbot:stats:misses'
+
+
+def counters_atomic():
+    """
+    Only Redis and Memcached increment server-side. The database / locmem / file backends
+    implement incr() as get + set, so concurrent workers can lose increments there: the
+    hit/miss counters are then approximate and cache_stats() says so.
+    """
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], (RedisCache, BaseMemcachedCache))
+
+
+def canonical_query(query, must_have, boost):
+    """
+    Order-, case- and punctuation-insensitive form of a parsed query:
+    sorted expanded terms (repeats kept: they change the TF-IDF vector) + sorted must_have
+    + sorted boost weights.
+    """
+    return {
+        "terms": sorted(re.findall(r"\w+", preprocess(expand_query(query)))),
+        "must_have": sorted({preprocess(x) for x in must_have or ()}),
+        "boost": sorted((preprocess(k), v) for k, v in (boost or {}).items()),
+    }
+
+
+def cache_key(query, must_have, boost):
+    raw = json.dumps(canonical_query(query, must_have, boost), separators=(',', ':'))
+    digest = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    # dataset/tags hash + presets version: a new CSV, tags.json or saved preset never serves old answers
+    return f"{KEY_PREFIX}:{index.digest()[:16]}:{get_presets_version()[:12]}:{digest}"
+
+
+def _count(key):
+    # exact on Redis/Memcached, best-effort elsewhere (see counters_atomic)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def lookup(key):
+    """Cached result for `key` (None on a miss); updates the hit/miss counters."""
+    result = cache.get(key)
+    _count(MISSES_KEY if result is None else HITS_KEY)
+    return result
+
+
+def store(key, result):
+    cache.set(key, result, RESULT_TIMEOUT)
+
+
+def cache_stats():
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 3) if total else None,
+        "approximate": not counters_atomic(),
+    }
@@ -0,0 +1,47 @@
+# chatbot/management/commands/build_feature_store.py
+import time
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+from EldenRingInsider.models import Build
+from EldenRingInsider.presets import iter_presets
+from ML import feature_store
+
+
+class Command(BaseCommand):
+    help = ('Materialize build presets from the database into a new memory-mappable feature-store version '
+            '(incremental: only builds newer than the current version, unless --full)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Rebuild from every build (picks up edited / deleted presets)')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched from the database per round-trip')
+        parser.add_argument('--from-csv', default=None, metavar='PATH',
+                            help='Seed a full version from an ml_presets_*.csv instead of the database')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['from_csv']:
+            presets = feature_store.presets_from_frame(pd.read_csv(options['from_csv']))
+            manifest = feature_store.write_version(presets)
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {manifest['version']} ({manifest['builds']} builds) from {options['from_csv']}"
+            ))
+            return
+
+        base = None if options['full'] else feature_store.current_version()
+
+        queryset = Build.objects.all()
+        if base:
+            queryset = queryset.filter(id__gt=feature_store.read_manifest(base)['max_build_id'])
+            if not queryset.exists():
+                self.stdout.write(self.style.SUCCESS(f"Up to date: {base}"))
+                return
+
+        manifest = feature_store.write_version(iter_presets(queryset, chunk_size=options['chunk_size']), base=base)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {manifest['version']} ({manifest['builds']} builds, {manifest['items']} items"
+            f"{', from ' + base if base else ''}) in {time.perf_counter() - started:.2f}s"
+        ))
+        self.stdout.write("Run build_ml_index to refit the recommender on it.")
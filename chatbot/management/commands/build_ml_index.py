@@ -0,0 +1,26 @@
+# chatbot/management/commands/build_ml_index.py
+import time
+
+from django.core.management.base import BaseCommand
+from ML.recommend_plus import index
+
+
+class Command(BaseCommand):
+    help = 'Refit the recommender TF-IDF model and save it as an artifact (keyed by the presets CSV + tags.json hash)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Only report whether an artifact for the current data already exists')
+
+    def handle(self, *args, **options):
+        path = index.path()
+        if options['check']:
+            if index.load() is not None:
+                self.stdout.write(self.style.SUCCESS(f"Up to date: {path}"))
+            else:
+                self.stdout.write(self.style.WARNING(f"Missing: {path}"))
+            return
+
+        started = time.perf_counter()
+        path = index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Saved {path} in {time.perf_counter() - started:.2f}s"))
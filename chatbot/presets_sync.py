@@ -0,0 +1,41 @@
+# chatbot/presets_sync.py
+import threading
+
+import pandas as pd
+
+from EldenRingInsider.models import Build
+from EldenRingInsider.presets import csv_header, csv_row, get_presets_version, iter_presets
+from ML import generate_build, recommend_plus
+
+_lock = threading.Lock()
+_synced_version = None
+
+
+def presets_frame(queryset) -> pd.DataFrame:
+    """Builds from the database in the ml_presets CSV layout the ML modules load."""
+    return pd.DataFrame([csv_row(p) for p in iter_presets(queryset)], columns=csv_header())
+
+
+def sync_ml_indexes() -> int:
+    """
+    Pull presets saved since this worker's ML indexes were built and append them in place.
+
+    Costs one cache read while nothing has changed. Only builds newer than the newest one already
+    indexed are added; edits/deletes of existing presets are picked up by the next full
+    `build_ml_index`. Returns the number of builds added.
+    """
+    global _synced_version
+    version = get_presets_version()
+    if version == _synced_version:
+        return 0
+    with _lock:
+        if version == _synced_version:
+            return 0
+        newest = int(recommend_plus.index.get()["raw_df"]["build_id"].max())
+        df = presets_frame(Build.objects.filter(id__gt=newest))
+        added = 0
+        if not df.empty:
+            added = recommend_plus.add_builds(df)
+            generate_build.add_builds(df)
+        _synced_version = version
+        return added
@@ -5,4 +5,5 @@ from . import views
 
 urlpatterns = [
     path('chatbot/', views.chatbot_api, name='chatbot_api'),
+    path('chatbot/cache-stats/', views.chatbot_cache_stats, name='chatbot_cache_stats'),
 ]
\ No newline at end of file
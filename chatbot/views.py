@@ -1,11 +1,32 @@
 # myproject/chatbot/views.py
+import asyncio
 import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
+from ML import generate_build as build_generator
 from ML.recommend_plus import recommend_build
-from ML.generate_build import generate_build, weapon_catalog
+from ML.generate_build import generate_build
 import re
 
+from .cache import cache_key, cache_stats, lookup, store
+from .presets_sync import sync_ml_indexes
+
+logger = logging.getLogger(__name__)
+
+# Both pipeline stages run here, side by side. Bounded so a burst of chatbot traffic
+# can't spawn unbounded threads; numpy/scipy release the GIL for the heavy parts.
+STAGE_POOL = ThreadPoolExecutor(max_workers=getattr(settings, 'CHATBOT_STAGE_WORKERS', 4),
+                                thread_name_prefix='chatbot-stage')
+
+# Per-stage budget (seconds, measured from the start of the request) and what to return
+# in its place when the budget is exceeded.
+STAGE_TIMEOUTS = getattr(settings, 'CHATBOT_STAGE_TIMEOUTS', {"recommended": 2.0, "generated": 2.0})
+STAGE_FALLBACKS = {"recommended": [], "generated": {}}
 
 
 def parse_query(query: str):
@@ -20,7 +41,7 @@ def parse_query(query: str):
 
     boost = {}
     # Explicit item detection with fuzzy match
-    for item in weapon_catalog:
+    for item in build_generator.catalogs.weapon_catalog:
         if item.lower() in query.lower():
             must_have.append(item)
             boost[item] = boost.get(item, 0) + 5
@@ -34,8 +55,30 @@ def parse_query(query: str):
     return must_have, boost
 
 
+async def run_stages(stages):
+    """
+    Run {name: callable} concurrently on STAGE_POOL.
+    Returns ({name: result}, [names that ran out of time]); a stage that times out keeps running
+    in its thread, but the response doesn't wait for it.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    futures = {name: loop.run_in_executor(STAGE_POOL, fn) for name, fn in stages.items()}
+
+    results, timed_out = {}, []
+    for name, future in futures.items():
+        budget = STAGE_TIMEOUTS.get(name, 2.0) - (loop.time() - started)
+        try:
+            results[name] = await asyncio.wait_for(future, timeout=max(budget, 0))
+        except asyncio.TimeoutError:
+            logger.warning("chatbot stage %r timed out after %.1fs", name, STAGE_TIMEOUTS.get(name, 2.0))
+            results[name] = STAGE_FALLBACKS.get(name)
+            timed_out.append(name)
+    return results, timed_out
+
+
 @require_POST
-def chatbot_api(request):
+async def chatbot_api(request):
 
     try:
         if request.method == "GET":
@@ -45,18 +88,39 @@ def chatbot_api(request):
             data = json.loads(request.body)
             query = data.get("message", "")
 
+        # fold in presets saved since the last request (usually a single cache read)
+        await sync_to_async(sync_ml_indexes)()
+
         must_have, boost = parse_query(query)
-        recommended_builds = recommend_build(query, top_n=3, must_have=must_have, boost=boost)
-        generated_build = generate_build(query=query)
+        key = await sync_to_async(cache_key)(query, must_have, boost)
+        results = await sync_to_async(lookup)(key)
+        hit = results is not None
+        timed_out = []
 
-        return JsonResponse({
-            "status": "success",
-            "results": {
-                "recommended": recommended_builds,
-                "generated": generated_build
-            }
-        })
+        if not hit:
+            results, timed_out = await run_stages({
+                "recommended": lambda: recommend_build(query, top_n=3, must_have=must_have, boost=boost),
+                "generated": lambda: generate_build(query=query),
+            })
+            if not timed_out:
+                # partial answers are never cached
+                await sync_to_async(store)(key, results)
+
+        payload = {
+            "status": "partial" if timed_out else "success",
+            "results": results
+        }
+        if timed_out:
+            payload["timed_out"] = timed_out
+        response = JsonResponse(payload)
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        return response
 
     except Exception:
-        print("=== Chatbot Exception ===")
-        return JsonResponse({"status": "error", "message": "An internal server error occurred."}, status=500)
\ No newline at end of file
+        logger.exception("chatbot request failed")
+        return JsonResponse({"status": "error", "message": "An internal server error occurred."}, status=500)
+
+
+@require_GET
+def chatbot_cache_stats(request):
+    return JsonResponse(cache_stats())
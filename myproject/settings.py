@@ -51,6 +51,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # trigram / full-text lookups used by item search
     'EldenRingInsider',
     'chatbot',
 ]
@@ -106,6 +107,46 @@ else:
     }
 
 
+# Cache
+# The catalog / presets version stamps live here, so the backend must be shared by every process
+# (server workers, import_erdb, loaddata); a per-process LocMemCache does not work. The default, a
+# table in the main database (created by migration 0020), is for development: in production set
+# DJANGO_CACHE_BACKEND to Redis (django.core.cache.backends.redis.RedisCache) or Memcached so cache
+# reads aren't database round-trips.
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "django_cache"),
+    }
+}
+
+# Seconds a worker reuses the catalog version stamp before re-reading it from the cache
+CATALOG_VERSION_TTL = float(os.environ.get("CATALOG_VERSION_TTL", "1.0"))
+
+
+# ML artifacts
+# The recommender's fitted TF-IDF model is saved under ML/artifacts/ (override with ML_ARTIFACT_DIR).
+# With ML_EAGER_LOAD=True each worker loads the saved artifact at startup (it never fits at boot);
+# otherwise it is loaded/fitted on the first chatbot request.
+
+ML_EAGER_LOAD = os.environ.get("ML_EAGER_LOAD", "False") == "True"
+
+# Precomputed attack-rating tables (manage.py build_ar_tables) are memory-mapped from here.
+AR_TABLE_DIR = os.environ.get("AR_TABLE_DIR", str(BASE_DIR / "artifacts" / "attack_rating"))
+
+# Chatbot answers are cached per canonical query (and dataset hash) for this many seconds.
+CHATBOT_CACHE_TIMEOUT = int(os.environ.get("CHATBOT_CACHE_TIMEOUT", 60 * 60))
+
+# The chatbot view runs recommendation and generation concurrently on a small thread pool;
+# a stage that misses its budget (seconds) is returned empty and flagged in "timed_out".
+CHATBOT_STAGE_WORKERS = int(os.environ.get("CHATBOT_STAGE_WORKERS", 4))
+CHATBOT_STAGE_TIMEOUTS = {
+    "recommended": float(os.environ.get("CHATBOT_RECOMMEND_TIMEOUT", 2.0)),
+    "generated": float(os.environ.get("CHATBOT_GENERATE_TIMEOUT", 2.0)),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -32,6 +32,11 @@ urlpatterns = [
     path('builds/', views.builds_view, name='builds'),
     path('get_items/', views.get_items, name='get_items'),
     path('recommend_build/', views.recommend_build, name='recommend_build'),
+    path('recommend_build/batch/', views.recommend_build_batch, name='recommend_build_batch'),
+    path('attack_rating/', views.attack_rating, name='attack_rating'),
+    path('optimize_stats/', views.optimize_stats_view, name='optimize_stats'),
+    path('optimize_armor/', views.optimize_armor_view, name='optimize_armor'),
+    path('rank_spells/', views.rank_spells_view, name='rank_spells'),
     path('save_item_to_build/', views.save_item_to_build, name='save_item_to_build'),
     path('save_as_preset/', views.save_as_preset, name='save_as_preset'),
     path('clear_custom_build/', views.clear_custom_build, name='clear_custom_build'),
@@ -8,6 +8,6 @@ python manage.py migrate --noinput
 echo "Loading fixture data..."
 python manage.py loaddata data.json
 
-# Start the Gunicorn server
+# Start the Gunicorn server (uvicorn workers: the chatbot API is an async view and needs ASGI)
 echo "Starting Gunicorn server..."
-gunicorn myproject.wsgi:application --bind 0.0.0.0:8000
\ No newline at end of file
+gunicorn myproject.asgi:application -k uvicorn.workers.UvicornWorker --bind 0.0.0.0:8000
\ No newline at end of file